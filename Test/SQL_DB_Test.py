@@ -1,4 +1,9 @@
+import os
 import sqlite3
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.mcp_logger import MCPLogger
 
 conn = sqlite3.connect('../vision_logs.db')
 cursor = conn.cursor()
@@ -7,10 +12,14 @@ cursor = conn.cursor()
 cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
 print("Tables:", cursor.fetchall())
 
-# View contents of vision_logs
-cursor.execute("SELECT * FROM vision_logs")
-rows = cursor.fetchall()
-for row in rows:
+# View contents of vision_logs (streamed, payloads decoded; the table can be large)
+logger = MCPLogger('../vision_logs.db', write_behind=False, retention_days=None)
+for row in logger.query():
     print(row)
+logger.close()
+
+# Per-agent totals from the per-minute counts MCPLogger maintains
+cursor.execute("SELECT agent_type, SUM(count) FROM log_counts_minute GROUP BY agent_type")
+print("Counts:", cursor.fetchall())
 
 conn.close()
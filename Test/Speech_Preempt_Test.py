@@ -0,0 +1,39 @@
+import os
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.speech_queue import SpeechService, PRIORITY_URGENT, PRIORITY_HIGH, PRIORITY_LOW
+
+# Fake audio: a clip "plays" for 5 seconds unless stop() interrupts it
+stopped = threading.Event()
+played = []
+
+
+def play(utterance):
+    played.append(utterance.text)
+    stopped.wait(5)
+
+
+service = SpeechService(play, stopped.set, start=stopped.clear)
+
+# HIGH waits for LOW chatter that is already playing
+low = service.say("I see a chair, a table and a long list of other things", priority=PRIORITY_LOW)
+time.sleep(0.2)
+high = service.say("Barcode scanned", priority=PRIORITY_HIGH)
+time.sleep(0.2)
+assert low.status == "playing", low.status
+
+# URGENT (camera failure, shutdown, system errors) cuts it off
+started = time.time()
+urgent = service.say("Camera error occurred", priority=PRIORITY_URGENT)
+assert low.wait(1), "LOW speech was not interrupted"
+assert low.status == "preempted", low.status
+print(f"LOW speech interrupted after {(time.time() - started) * 1000:.0f} ms")
+
+time.sleep(0.2)
+assert played[:2] == [low.text, urgent.text], played  # Urgent plays before the queued HIGH
+service.shutdown()
+print("Order:", played)
+print("Stats:", service.stats())
@@ -4,13 +4,16 @@ from core.master_agent import MasterAgent
 from core.voice_control import VoiceControl
 import threading
 import queue
+import os
 import time
 
 
 class VisionAIDUI:
     def __init__(self, master):
         self.master = master
-        self.controller = MasterAgent()
+        # Agents load lazily (most used first); VISIONAID_PROCESS_MODE=1 runs each in its own process
+        self.controller = MasterAgent(prewarm="usage",
+                                      process_mode=os.environ.get("VISIONAID_PROCESS_MODE") == "1")
         self.voice_control = VoiceControl()
         self.voice_queue = queue.Queue()
         self.voice_active = False
@@ -49,7 +52,8 @@ class VisionAIDUI:
             'document_reader': {'display_name': 'Document OCR'},
             'navigation': {'display_name': 'Navigation'},
             'ecommerce_agent': {'display_name': 'Search Online'},
-            'emotion_detection_agent': {'display_name': 'Emotion Detection'}
+            'emotion_detection_agent': {'display_name': 'Emotion Detection'},
+            'assist': {'display_name': 'Assist (Objects + Barcodes)'}
         }
 
         for agent_name, config in agent_config.items():
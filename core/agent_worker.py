@@ -0,0 +1,259 @@
+"""Supervised process-per-agent execution
+
+Each agent runs in its own spawned worker process, so CPU-heavy inference
+never competes with the master's ZMQ listener, status display or Tk UI for
+the GIL. Workers publish their results on the usual MCP bus
+(tcp://localhost:5555) and send a heartbeat message on the same bus. The
+supervisor in the master restarts workers that crash (exit nonzero, e.g.
+an exception escaping run()) or stop sending heartbeats, with exponential
+backoff. A worker whose agent returns from run() by itself (time limit,
+'q' pressed, dialog done) exits 0 and is not restarted.
+
+Heartbeats prove the agent's loop is making progress, not just that the
+process exists: for agents listed in PROGRESS_METRICS the worker only
+beats while the metric their loop bumps every frame keeps moving, so a
+loop stuck in a camera read or a hung model call is restarted too.
+
+To let several workers share one camera, run a frame bus producer
+(python -m core.frame_bus produce) and set VISIONAID_FRAME_BUS; workers
+inherit the environment.
+"""
+import multiprocessing
+import os
+import threading
+import time
+
+import zmq
+
+from core.metrics import metrics
+from core.mcp_protocol import publish
+from core.mcp_client import close_publisher
+from core.mcp_transport import new_socket, close_all
+
+HEARTBEAT_AGENT = "heartbeat"
+DEFAULT_MCP_ENDPOINT = "tcp://localhost:5555"
+
+# Agent -> metric its run() loop bumps once per frame. Agents not listed
+# (voice dialogs that legitimately wait on the user) beat unconditionally.
+PROGRESS_METRICS = {
+    "object_detection": "object.frames",
+    "barcode_scanner": "barcode.frames",
+    "document_reader": "document.capture_seconds",
+    "emotion_detection_agent": "emotion.frames",
+}
+
+
+def _progress(agent_name):
+    """Current value of the agent's progress metric, or None if it has none"""
+    name = PROGRESS_METRICS.get(agent_name)
+    if name is None:
+        return None
+    metric = metrics.metrics.get(name)
+    if metric is None:
+        return 0
+    return metric.count if hasattr(metric, "count") else metric.value
+
+
+def worker_main(agent_name, stop_event, heartbeat_interval=1.0, endpoint=DEFAULT_MCP_ENDPOINT,
+                stall_timeout=5.0, startup_grace=60.0):
+    """Entry point of a worker process: load the model, build the agent and run it
+
+    Models are preloaded (load plus a dummy inference) while the worker is
+    still "loading", so the first frames of run() are not slowed by it. Once
+    the agent is running, heartbeats stop when its progress metric has not
+    moved for stall_timeout seconds (startup_grace before the first frame).
+    """
+    from core.master_agent import AGENT_FACTORIES
+    import importlib
+
+    # Its own socket: the cached one belongs to the MCPPublisher sender thread
+    heartbeat = new_socket(zmq.PUB, endpoint)
+
+    state = {"value": "loading"}
+    finished = threading.Event()
+
+    def _beat():
+        last_progress = _progress(agent_name)
+        progressed_at = time.time()
+        seen_progress = False
+        while not (stop_event.is_set() or finished.is_set()):
+            now = time.time()
+            progress = _progress(agent_name)
+            if state["value"] != "running":
+                progressed_at = now  # Loading: the stall clock starts with run()
+            elif progress != last_progress:
+                last_progress, progressed_at, seen_progress = progress, now, True
+            limit = stall_timeout if seen_progress else startup_grace
+            stalled = progress is not None and now - progressed_at > limit
+
+            if not stalled:
+                try:
+                    publish(heartbeat, HEARTBEAT_AGENT,
+                            {"worker": agent_name, "pid": os.getpid(), "state": state["value"]},
+                            source="worker", flags=zmq.NOBLOCK)
+                except zmq.ZMQError:
+                    pass
+            finished.wait(heartbeat_interval)
+
+    heartbeat_thread = threading.Thread(target=_beat, daemon=True, name="Heartbeat")
+    heartbeat_thread.start()
+
+    module_name, class_name, kwargs = AGENT_FACTORIES[agent_name]
+    agent_class = getattr(importlib.import_module(module_name), class_name)
+    if hasattr(agent_class, "preload"):
+        agent_class.preload()
+    agent = agent_class(**kwargs)
+
+    def _watch_stop():
+        stop_event.wait()
+        agent.terminate()
+
+    threading.Thread(target=_watch_stop, daemon=True, name="StopWatcher").start()
+
+    try:
+        state["value"] = "running"
+        agent.run()
+    finally:
+        state["value"] = "stopped"
+        finished.set()  # Ends the heartbeat thread before its socket closes
+        heartbeat_thread.join(heartbeat_interval + 1)
+        if not heartbeat_thread.is_alive():
+            heartbeat.close()
+        close_publisher()
+        close_all()
+
+
+class AgentProcess:
+    """Master-side handle for one supervised worker"""
+
+    def __init__(self, supervisor, agent_name):
+        self.supervisor = supervisor
+        self.agent_name = agent_name
+        self.process = None
+        self.stop_event = None
+        self.started_at = 0.0
+        self.last_heartbeat = 0.0
+        self.restarts = 0
+        self.next_restart = None  # When a crashed worker is due to come back
+
+    @property
+    def display_name(self):
+        return f"{self.agent_name} (pid {self.process.pid if self.process else '-'})"
+
+    def is_alive(self):
+        return self.process is not None and self.process.is_alive()
+
+    def terminate(self):
+        self.supervisor.stop(self.agent_name)
+
+
+class AgentSupervisor:
+    """Spawns agent workers, watches their heartbeats and restarts them with backoff"""
+
+    def __init__(self, heartbeat_timeout=10.0, base_backoff=1.0, max_backoff=60.0,
+                 stable_after=60.0, check_interval=1.0):
+        self.heartbeat_timeout = heartbeat_timeout
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.stable_after = stable_after  # Uptime after which the backoff resets
+        self.check_interval = check_interval
+        self.mp = multiprocessing.get_context("spawn")  # Forking a process with ZMQ threads is unsafe
+        self.lock = threading.Lock()
+        self.workers = {}
+        self.running = True
+        threading.Thread(target=self._monitor, daemon=True, name="AgentSupervisor").start()
+
+    def _spawn(self, handle):
+        """Start (or restart) a worker process (lock held)"""
+        handle.stop_event = self.mp.Event()
+        handle.process = self.mp.Process(
+            target=worker_main, args=(handle.agent_name, handle.stop_event),
+            name=f"agent-{handle.agent_name}", daemon=True
+        )
+        handle.process.start()
+        handle.started_at = time.time()
+        handle.last_heartbeat = handle.started_at  # Grace period while the agent loads
+        handle.next_restart = None
+        print(f"[Supervisor] Started {handle.agent_name} (pid {handle.process.pid})")
+
+    def start(self, agent_name):
+        """Run an agent in a worker process and return its handle"""
+        with self.lock:
+            handle = self.workers.get(agent_name)
+            if handle is not None and handle.is_alive():
+                return handle
+            handle = AgentProcess(self, agent_name)
+            self.workers[agent_name] = handle
+            self._spawn(handle)
+            return handle
+
+    def stop(self, agent_name, timeout=3.0):
+        """Ask a worker to finish, killing it if it does not exit in time"""
+        with self.lock:
+            handle = self.workers.pop(agent_name, None)
+        if handle is None or handle.process is None:
+            return
+        handle.stop_event.set()
+        handle.process.join(timeout)
+        if handle.process.is_alive():
+            print(f"[Supervisor] {agent_name} did not stop in time, killing it")
+            handle.process.kill()
+            handle.process.join(1)
+
+    def record_heartbeat(self, data):
+        """Called by the master for every heartbeat message on the MCP bus"""
+        with self.lock:
+            handle = self.workers.get(data.get("worker"))
+            if handle is not None and handle.process is not None and data.get("pid") == handle.process.pid:
+                handle.last_heartbeat = time.time()
+
+    def _backoff(self, handle):
+        if time.time() - handle.started_at > self.stable_after:
+            handle.restarts = 0
+        delay = min(self.max_backoff, self.base_backoff * 2 ** handle.restarts)
+        handle.restarts += 1
+        return delay
+
+    def _monitor(self):
+        while self.running:
+            time.sleep(self.check_interval)
+            now = time.time()
+            with self.lock:
+                for name, handle in list(self.workers.items()):
+                    if handle.next_restart is not None:
+                        if now >= handle.next_restart:
+                            self._spawn(handle)
+                        continue
+
+                    if not handle.is_alive():
+                        if handle.process.exitcode == 0:
+                            print(f"[Supervisor] {name} finished")
+                            del self.workers[name]
+                            continue
+                        delay = self._backoff(handle)
+                        print(f"[Supervisor] {name} crashed (exit {handle.process.exitcode}), "
+                              f"restarting in {delay:.0f}s")
+                        handle.next_restart = now + delay
+                    elif now - handle.last_heartbeat > self.heartbeat_timeout:
+                        delay = self._backoff(handle)
+                        print(f"[Supervisor] {name} missed heartbeats (stalled or hung), "
+                              f"restarting in {delay:.0f}s")
+                        handle.process.kill()
+                        handle.next_restart = now + delay
+
+    def status(self):
+        with self.lock:
+            return {
+                name: {
+                    "pid": handle.process.pid if handle.process else None,
+                    "alive": handle.is_alive(),
+                    "restarts": handle.restarts,
+                    "heartbeat_age": time.time() - handle.last_heartbeat,
+                }
+                for name, handle in self.workers.items()
+            }
+
+    def shutdown(self):
+        self.running = False
+        for name in list(self.workers):
+            self.stop(name)
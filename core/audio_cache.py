@@ -0,0 +1,170 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+DEFAULT_CACHE_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "memory", "tts_cache"
+)
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024  # 50 MB is thousands of short phrases
+
+
+class AudioCache:
+    """Content-addressed on-disk cache of synthesized speech with LRU eviction"""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES, offline_only=False):
+        self.cache_dir = os.path.abspath(cache_dir)
+        self.max_bytes = max_bytes
+        self.offline_only = offline_only  # Never synthesize, serve cached audio only
+        self.lock = threading.Lock()
+
+        # key -> size in bytes, ordered from least to most recently used
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._load_index()
+
+    @staticmethod
+    def make_key(text, voice, lang, rate):
+        """Stable content hash for one (text, voice, language, rate) combination"""
+        raw = json.dumps([text, voice, lang, rate], ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.mp3")
+
+    def _load_index(self):
+        """Rebuild the LRU order from files already on disk (oldest access first)"""
+        found = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".mp3"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            found.append((stat.st_mtime, name[:-4], stat.st_size))
+
+        for _, key, size in sorted(found):
+            self.entries[key] = size
+            self.total_bytes += size
+
+        with self.lock:
+            self._evict()
+
+    def _evict(self):
+        """Drop least recently used entries until the size budget is met (lock held)"""
+        while self.total_bytes > self.max_bytes and self.entries:
+            key, size = self.entries.popitem(last=False)
+            self.total_bytes -= size
+            self.evictions += 1
+            try:
+                os.remove(self._path(key))
+            except OSError as e:
+                print(f"[AudioCache] Eviction warning: {e}")
+
+    def get(self, text, voice="com", lang="en", rate="normal"):
+        """Return cached audio bytes or None on a miss"""
+        key = self.make_key(text, voice, lang, rate)
+        with self.lock:
+            if key not in self.entries:
+                self.misses += 1
+                return None
+
+            path = self._path(key)
+            try:
+                with open(path, "rb") as f:
+                    data = f.read()
+            except OSError:
+                # File vanished behind our back
+                self.total_bytes -= self.entries.pop(key)
+                self.misses += 1
+                return None
+
+            self.entries.move_to_end(key)
+            self.hits += 1
+
+        # Persist recency so the LRU order survives restarts
+        try:
+            now = time.time()
+            os.utime(path, (now, now))
+        except OSError:
+            pass
+        return data
+
+    def put(self, text, data, voice="com", lang="en", rate="normal"):
+        """Store audio bytes for a phrase, evicting old entries if needed"""
+        if not data:
+            return
+        key = self.make_key(text, voice, lang, rate)
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+
+        with self.lock:
+            try:
+                with open(tmp_path, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                print(f"[AudioCache] Write failed: {e}")
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+                return
+
+            if key in self.entries:
+                self.total_bytes -= self.entries[key]
+            self.entries[key] = len(data)
+            self.entries.move_to_end(key)
+            self.total_bytes += len(data)
+            self._evict()
+
+    def get_or_synthesize(self, text, synthesize, voice="com", lang="en", rate="normal"):
+        """Return cached audio, calling synthesize() on a miss unless offline"""
+        data = self.get(text, voice, lang, rate)
+        if data is not None:
+            return data
+
+        if self.offline_only:
+            print(f"[AudioCache] Offline and not cached: {text[:50]}")
+            return None
+
+        data = synthesize()
+        self.put(text, data, voice, lang, rate)
+        return data
+
+    def stats(self):
+        """Snapshot of cache counters"""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def clear(self):
+        """Remove every cached phrase"""
+        with self.lock:
+            for key in list(self.entries):
+                try:
+                    os.remove(self._path(key))
+                except OSError:
+                    pass
+            self.entries.clear()
+            self.total_bytes = 0
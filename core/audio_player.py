@@ -0,0 +1,129 @@
+import io
+import threading
+import time
+from collections import OrderedDict, deque
+
+import pygame
+
+from core.metrics import metrics
+
+
+class AudioPlayer:
+    """Long-lived playback engine that keeps the audio device open
+
+    Audio is decoded once into in-memory PCM (pygame Sound objects) and played
+    on a reserved channel. Completion is signalled through a threading.Event
+    rather than polling the mixer.
+    """
+
+    def __init__(self, frequency=24000, buffer=512, decoded_cache_size=64, latency_window=200):
+        self.frequency = frequency  # gTTS produces 24 kHz mono
+        self.buffer = buffer  # Small buffer = less output latency
+        self.lock = threading.Lock()
+        self.channel = None
+        self.stopped = threading.Event()
+
+        # Decoded PCM for recently played phrases, keyed by the caller
+        self.decoded = OrderedDict()
+        self.decoded_cache_size = decoded_cache_size
+
+        # Latency metrics (seconds)
+        self.start_latencies = deque(maxlen=latency_window)  # enqueue -> first sample
+        self.decode_times = deque(maxlen=latency_window)
+        self.played = 0
+        self.interrupted = 0
+
+    def open(self):
+        """Open the audio device once; later calls are no-ops"""
+        with self.lock:
+            if self.channel is not None:
+                return
+            pygame.mixer.init(frequency=self.frequency, size=-16, channels=1, buffer=self.buffer)
+            pygame.mixer.set_reserved(1)
+            self.channel = pygame.mixer.Channel(0)
+            print(f"[AudioPlayer] Audio device opened at {self.frequency} Hz")
+
+    def close(self):
+        """Release the audio device"""
+        self.stop()
+        with self.lock:
+            if self.channel is not None:
+                pygame.mixer.quit()
+                self.channel = None
+                self.decoded.clear()
+
+    def decode(self, audio, key=None):
+        """Decode compressed audio bytes into a playable in-memory Sound"""
+        if key is not None and key in self.decoded:
+            self.decoded.move_to_end(key)
+            return self.decoded[key]
+
+        self.open()
+        started = time.perf_counter()
+        sound = pygame.mixer.Sound(file=io.BytesIO(audio))
+        self.decode_times.append(time.perf_counter() - started)
+
+        if key is not None:
+            self.decoded[key] = sound
+            if len(self.decoded) > self.decoded_cache_size:
+                self.decoded.popitem(last=False)
+        return sound
+
+    def play(self, audio, key=None, enqueued_at=None, on_start=None):
+        """Play audio bytes (or a decoded Sound) and block until it ends or stop() is called
+
+        on_start() is called as soon as the first sample is handed to the mixer.
+
+        Returns True if playback ran to completion.
+        """
+        sound = audio if isinstance(audio, pygame.mixer.Sound) else self.decode(audio, key)
+        self.open()
+
+        if self.stopped.is_set():
+            return False  # Stopped before it started; see reset()
+        self.channel.play(sound)
+        if on_start is not None:
+            on_start()
+        if enqueued_at is not None:
+            self.start_latencies.append(time.time() - enqueued_at)
+            metrics.histogram("speech.start_latency_seconds").observe(self.start_latencies[-1])
+
+        # The clip length is known, so wait on the stop event for that long
+        interrupted = self.stopped.wait(sound.get_length())
+        if interrupted:
+            self.channel.stop()
+            self.interrupted += 1
+        else:
+            self.played += 1
+        return not interrupted
+
+    def reset(self):
+        """Forget an earlier stop() so the next clip plays; call when a new utterance starts"""
+        self.stopped.clear()
+
+    def stop(self):
+        """Interrupt the current clip (and any later one until reset())"""
+        self.stopped.set()
+        if self.channel is not None:
+            self.channel.stop()
+
+    @staticmethod
+    def _percentile(samples, pct):
+        if not samples:
+            return 0.0
+        ordered = sorted(samples)
+        index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def latency_stats(self):
+        """Enqueue-to-first-sample and decode latency summary in milliseconds"""
+        starts = list(self.start_latencies)
+        decodes = list(self.decode_times)
+        return {
+            "played": self.played,
+            "interrupted": self.interrupted,
+            "start_p50_ms": self._percentile(starts, 50) * 1000,
+            "start_p95_ms": self._percentile(starts, 95) * 1000,
+            "start_max_ms": max(starts) * 1000 if starts else 0.0,
+            "decode_p50_ms": self._percentile(decodes, 50) * 1000,
+        }
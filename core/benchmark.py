@@ -0,0 +1,114 @@
+"""Repeatable throughput/latency benchmark for the vision agents
+
+Runs an agent's per-frame work over a replayable frame source without any
+window, speech or MCP traffic:
+
+    python -m core.benchmark object_detection --source video:street.mp4 --frames 300
+    python -m core.benchmark barcode_scanner --source images:samples/ --loop
+    python -m core.benchmark emotion_detection_agent --source synthetic --realtime --fps 15
+"""
+import argparse
+import importlib
+import json
+import sys
+import time
+
+from core.frame_source import open_frame_source
+
+
+# agent name -> (module, class, per-frame call)
+BENCHMARKS = {
+    "object_detection": ("agents.vision_agent.object_detection", "ObjectDetectionAgent",
+                         lambda agent, frame: agent.detect(frame)),
+    "barcode_scanner": ("agents.vision_agent.barcode_reader", "BarcodeReaderAgent",
+                        lambda agent, frame: agent.decode(frame)),
+    "document_reader": ("agents.vision_agent.document_ocr", "DocumentOCRAgent",
+                        lambda agent, frame: agent.extract_text(frame)),
+    "emotion_detection_agent": ("agents.vision_agent.emotion_detection_agent", "EmotionDetectionAgent",
+                                lambda agent, frame: agent.detect_emotion(frame)),
+}
+
+
+def _percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def _summary(samples):
+    return {
+        "mean_ms": sum(samples) / len(samples) * 1000 if samples else 0.0,
+        "p50_ms": _percentile(samples, 50) * 1000,
+        "p95_ms": _percentile(samples, 95) * 1000,
+        "max_ms": max(samples) * 1000 if samples else 0.0,
+    }
+
+
+def run_benchmark(agent_name, source="synthetic", frames=300, warmup=5, **source_options):
+    """Process frames through one agent and return timing statistics"""
+    module_name, class_name, process = BENCHMARKS[agent_name]
+    frame_source = open_frame_source(source, **source_options)
+    agent_class = getattr(importlib.import_module(module_name), class_name)
+    agent = agent_class(source=frame_source)
+
+    capture_times = []
+    process_times = []
+    processed = 0
+    started = None
+    try:
+        while processed < frames + warmup:
+            t0 = time.perf_counter()
+            ret, frame = frame_source.read()
+            t1 = time.perf_counter()
+            if not ret:
+                break
+            process(agent, frame)
+            t2 = time.perf_counter()
+
+            processed += 1
+            if processed <= warmup:
+                continue  # Model warmup, lazy allocations
+            if started is None:
+                started = t0
+            capture_times.append(t1 - t0)
+            process_times.append(t2 - t1)
+    finally:
+        frame_source.release()
+
+    elapsed = time.perf_counter() - started if started is not None else 0.0
+    measured = len(process_times)
+    return {
+        "agent": agent_name,
+        "source": source if isinstance(source, str) else type(source).__name__,
+        "frames": measured,
+        "fps": measured / elapsed if elapsed else 0.0,
+        "capture": _summary(capture_times),
+        "process": _summary(process_times),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark a VisionAID vision agent")
+    parser.add_argument("agent", choices=sorted(BENCHMARKS))
+    parser.add_argument("--source", default="synthetic", help="camera, video:PATH, images:DIR, synthetic[:WxH]")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--fps", type=float, help="Replay rate (default: file rate or 30)")
+    parser.add_argument("--realtime", action="store_true", help="Pace replay at --fps instead of as fast as possible")
+    parser.add_argument("--loop", action="store_true", help="Restart the replay when it ends")
+    args = parser.parse_args(argv)
+
+    options = {}
+    if not args.source.startswith("camera"):
+        options = {"realtime": args.realtime, "loop": args.loop}
+        if args.fps:
+            options["fps"] = args.fps
+
+    result = run_benchmark(args.agent, args.source, args.frames, args.warmup, **options)
+    print(json.dumps(result, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,204 @@
+import threading
+import time
+from collections import deque
+
+import cv2
+
+
+class CameraService:
+    """Single owner of a capture device, shared by every vision agent
+
+    A dedicated thread grabs frames continuously into a small ring buffer, so
+    consumers always get the freshest frame instead of whatever the driver
+    had queued. The device stays open for idle_timeout seconds after the last
+    subscriber leaves, so switching agents does not reopen it.
+    """
+
+    def __init__(self, device=0, buffer_size=4, idle_timeout=10.0, max_failures=30):
+        self.device = device
+        self.buffer_size = buffer_size
+        self.idle_timeout = idle_timeout
+        self.max_failures = max_failures  # Consecutive failed reads before giving up
+
+        self.cond = threading.Condition()
+        self.frames = deque(maxlen=buffer_size)  # (seq, timestamp, frame)
+        self.seq = 0
+        self.thread = None
+        self.stop_event = None
+        self.running = False
+        self.failed = False
+        self.subscribers = 0
+        self.close_timer = None
+
+        # Counters
+        self.frames_captured = 0
+        self.read_failures = 0
+        self.opened_count = 0
+
+    def _open(self):
+        """Open the device and start the grab thread (cond held)"""
+        if self.running:
+            return True
+        capture = cv2.VideoCapture(self.device)
+        if not capture.isOpened():
+            capture.release()
+            return False
+        # Keep the driver queue short; the grab thread does the buffering
+        capture.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+        self.stop_event = threading.Event()
+        self.running = True
+        self.failed = False
+        self.opened_count += 1
+        self.thread = threading.Thread(target=self._capture_loop, args=(capture, self.stop_event),
+                                       daemon=True, name=f"CameraService-{self.device}")
+        self.thread.start()
+        print(f"[CameraService] Opened camera {self.device}")
+        return True
+
+    def _capture_loop(self, capture, stop_event):
+        failures = 0
+        while not stop_event.is_set():
+            ret, frame = capture.read()
+            if not ret:
+                failures += 1
+                self.read_failures += 1
+                if failures >= self.max_failures:
+                    print(f"[CameraService] Camera {self.device} stopped delivering frames")
+                    with self.cond:
+                        if not stop_event.is_set():
+                            self.failed = True
+                            self.running = False
+                        self.cond.notify_all()
+                    break
+                time.sleep(0.01)
+                continue
+
+            failures = 0
+            with self.cond:
+                if stop_event.is_set():
+                    break
+                self.seq += 1
+                self.frames.append((self.seq, time.time(), frame))
+                self.frames_captured += 1
+                self.cond.notify_all()
+
+        capture.release()
+
+    def _close(self):
+        with self.cond:
+            self.close_timer = None
+            if self.subscribers > 0 or not self.running:
+                return
+            self.running = False
+            self.stop_event.set()
+            self.frames.clear()
+            self.cond.notify_all()
+            thread = self.thread
+        if thread is not None:
+            thread.join(timeout=2)
+        print(f"[CameraService] Closed camera {self.device}")
+
+    def acquire(self):
+        """Register a consumer, opening the device if needed"""
+        with self.cond:
+            if self.close_timer is not None:
+                self.close_timer.cancel()
+                self.close_timer = None
+            if not self._open():
+                return False
+            self.subscribers += 1
+            return True
+
+    def release(self):
+        """Unregister a consumer; the device closes after idle_timeout"""
+        with self.cond:
+            self.subscribers = max(0, self.subscribers - 1)
+            if self.subscribers == 0 and self.running and self.close_timer is None:
+                self.close_timer = threading.Timer(self.idle_timeout, self._close)
+                self.close_timer.daemon = True
+                self.close_timer.start()
+
+    def latest(self):
+        """Newest (seq, timestamp, frame) or None"""
+        with self.cond:
+            return self.frames[-1] if self.frames else None
+
+    def recent(self):
+        """Snapshot of the ring buffer, oldest first"""
+        with self.cond:
+            return list(self.frames)
+
+    def wait_for_frame(self, after_seq=0, timeout=1.0):
+        """Block until a frame newer than after_seq exists; returns it or None"""
+        deadline = time.time() + timeout
+        with self.cond:
+            while not self.frames or self.frames[-1][0] <= after_seq:
+                remaining = deadline - time.time()
+                if remaining <= 0 or self.failed or not self.running:
+                    return None
+                self.cond.wait(remaining)
+            return self.frames[-1]
+
+    def subscribe(self):
+        return CameraSubscription(self)
+
+    def stats(self):
+        with self.cond:
+            return {
+                "device": self.device,
+                "running": self.running,
+                "subscribers": self.subscribers,
+                "frames_captured": self.frames_captured,
+                "read_failures": self.read_failures,
+                "opened_count": self.opened_count,
+            }
+
+
+class CameraSubscription:
+    """Per-agent handle with the cv2.VideoCapture read()/release() interface"""
+
+    def __init__(self, service, timeout=1.0):
+        self.service = service
+        self.timeout = timeout
+        self.last_seq = 0
+        self.last_timestamp = None
+        self.active = service.acquire()
+
+    def isOpened(self):
+        return self.active and self.service.running
+
+    def read(self, copy=True):
+        """Return (ret, frame) with the freshest frame not yet seen by this handle
+
+        Frames are shared between subscribers, so copy=False must only be used
+        by consumers that never draw on the image.
+        """
+        if not self.active:
+            # Reading after release() re-attaches, so agents can be restarted
+            self.active = self.service.acquire()
+            if not self.active:
+                return False, None
+
+        item = self.service.wait_for_frame(self.last_seq, self.timeout)
+        if item is None:
+            return False, None
+        self.last_seq, self.last_timestamp, frame = item
+        return True, frame.copy() if copy else frame
+
+    def release(self):
+        if self.active:
+            self.active = False
+            self.service.release()
+
+
+_services = {}
+_services_lock = threading.Lock()
+
+
+def get_camera_service(device=0):
+    """Process-wide CameraService for a device"""
+    with _services_lock:
+        if device not in _services:
+            _services[device] = CameraService(device)
+        return _services[device]
@@ -0,0 +1,258 @@
+"""Zero-copy shared-memory frame bus for multi-process vision agents
+
+One producer writes each camera frame once into a fixed slot of a
+multiprocessing.shared_memory block and sends a tiny ZeroMQ notification
+(sequence number + slot). Any number of agent processes map the same block
+and read the frame as a numpy view without copying or serializing it.
+
+Layout of the shared block:
+    header   magic, format, slot count, frame shape and dtype
+    meta     one (seq, timestamp) record per slot
+    frames   slot_count preallocated frames
+
+Run a producer that feeds the bus from the shared camera:
+
+    python -m core.frame_bus produce --device 0
+"""
+import argparse
+import struct
+import sys
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+import zmq
+
+
+DEFAULT_BUS_NAME = "visionaid_frames"
+DEFAULT_NOTIFY_ENDPOINT = "tcp://127.0.0.1:5560"
+
+BUS_MAGIC = b"VAFB"
+BUS_FORMAT = 1
+HEADER = struct.Struct("<4sHHIII8s")  # magic, format, slots, height, width, channels, dtype
+HEADER_SIZE = 64
+META_DTYPE = np.dtype([("seq", "<i8"), ("timestamp", "<f8")])
+WRITING = -1  # seq value while a slot is being overwritten
+NOTIFY = struct.Struct("<qId")  # seq, slot, timestamp
+
+
+def _frame_geometry(shape):
+    height, width = shape[:2]
+    channels = shape[2] if len(shape) > 2 else 1
+    return height, width, channels
+
+
+class FrameBusWriter:
+    """Producer side: owns the shared memory block and the notification socket"""
+
+    def __init__(self, shape, dtype=np.uint8, slots=4, name=DEFAULT_BUS_NAME,
+                 notify_endpoint=DEFAULT_NOTIFY_ENDPOINT):
+        self.name = name
+        self.slots = slots
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        height, width, channels = _frame_geometry(self.shape)
+        frame_bytes = int(np.prod(self.shape)) * self.dtype.itemsize
+        meta_bytes = META_DTYPE.itemsize * slots
+
+        self.shm = shared_memory.SharedMemory(name=name, create=True,
+                                              size=HEADER_SIZE + meta_bytes + frame_bytes * slots)
+        HEADER.pack_into(self.shm.buf, 0, BUS_MAGIC, BUS_FORMAT, slots, height, width, channels,
+                         self.dtype.str.encode("ascii"))
+        self.meta = np.ndarray((slots,), dtype=META_DTYPE, buffer=self.shm.buf, offset=HEADER_SIZE)
+        self.meta["seq"] = 0
+        self.frames = np.ndarray((slots,) + self.shape, dtype=self.dtype, buffer=self.shm.buf,
+                                 offset=HEADER_SIZE + meta_bytes)
+        self.seq = 0
+
+        self.context = zmq.Context.instance()
+        self.notifier = self.context.socket(zmq.PUB)
+        self.notifier.setsockopt(zmq.SNDHWM, 4)
+        self.notifier.setsockopt(zmq.LINGER, 0)
+        self.notifier.bind(notify_endpoint)
+        print(f"[FrameBus] Writer '{name}' ready: {slots} slots of {self.shape} {self.dtype}")
+
+    def write(self, frame, timestamp=None):
+        """Copy one frame into the next slot and notify readers; returns its seq"""
+        if frame.shape != self.shape:
+            raise ValueError(f"Frame shape {frame.shape} does not match bus shape {self.shape}")
+        timestamp = time.time() if timestamp is None else timestamp
+        self.seq += 1
+        slot = self.seq % self.slots
+
+        # Seqlock: readers that see WRITING (or a changed seq) know the slot is torn
+        self.meta["seq"][slot] = WRITING
+        np.copyto(self.frames[slot], frame)
+        self.meta["timestamp"][slot] = timestamp
+        self.meta["seq"][slot] = self.seq
+
+        try:
+            self.notifier.send(NOTIFY.pack(self.seq, slot, timestamp), zmq.NOBLOCK)
+        except zmq.Again:
+            pass  # Readers fall back to scanning the meta table
+        return self.seq
+
+    def close(self):
+        self.notifier.close()
+        del self.meta, self.frames
+        self.shm.close()
+        self.shm.unlink()
+
+
+class FrameBusReader:
+    """Consumer side: maps the shared block read-only and follows notifications"""
+
+    def __init__(self, name=DEFAULT_BUS_NAME, notify_endpoint=DEFAULT_NOTIFY_ENDPOINT):
+        self.name = name
+        try:
+            self.shm = shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+        except TypeError:
+            self.shm = shared_memory.SharedMemory(name=name)
+            self._untrack()
+
+        magic, fmt, slots, height, width, channels, dtype = HEADER.unpack_from(self.shm.buf, 0)
+        if magic != BUS_MAGIC or fmt != BUS_FORMAT:
+            self.shm.close()
+            raise RuntimeError(f"'{name}' is not a VisionAID frame bus")
+        self.slots = slots
+        self.dtype = np.dtype(dtype.rstrip(b"\0").decode("ascii"))
+        self.shape = (height, width) if channels == 1 else (height, width, channels)
+        meta_bytes = META_DTYPE.itemsize * slots
+
+        self.meta = np.ndarray((slots,), dtype=META_DTYPE, buffer=self.shm.buf, offset=HEADER_SIZE)
+        self.frames = np.ndarray((slots,) + self.shape, dtype=self.dtype, buffer=self.shm.buf,
+                                 offset=HEADER_SIZE + meta_bytes)
+        self.frames.flags.writeable = False
+        self.last_seq = 0
+        self.torn_reads = 0
+
+        self.context = zmq.Context.instance()
+        self.listener = self.context.socket(zmq.SUB)
+        self.listener.setsockopt(zmq.RCVHWM, 4)
+        self.listener.setsockopt(zmq.LINGER, 0)
+        self.listener.setsockopt(zmq.SUBSCRIBE, b"")
+        self.listener.connect(notify_endpoint)
+
+    def _untrack(self):
+        """Stop this process's resource tracker from unlinking the writer's block"""
+        try:
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(self.shm._name, "shared_memory")
+        except Exception:
+            pass
+
+    def _newest_slot(self):
+        slot = int(np.argmax(self.meta["seq"]))
+        return int(self.meta["seq"][slot]), slot
+
+    def read(self, timeout=1.0):
+        """Return (seq, timestamp, frame_view) for the newest unseen frame, or None on timeout
+
+        The view aliases shared memory: process it, then call is_valid(seq)
+        if you need to know the producer did not overwrite it meanwhile.
+        """
+        deadline = time.time() + timeout
+        while True:
+            # Drain notifications so we only look at the newest frame
+            notified = False
+            while self.listener.poll(0):
+                self.listener.recv()
+                notified = True
+            seq, slot = self._newest_slot()
+            if seq > self.last_seq:
+                timestamp = float(self.meta["timestamp"][slot])
+                if int(self.meta["seq"][slot]) == seq:
+                    self.last_seq = seq
+                    return seq, timestamp, self.frames[slot]
+                self.torn_reads += 1  # Overwritten while reading; look again
+                if time.time() < deadline:
+                    continue
+                return None
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return None
+            if not notified:
+                self.listener.poll(int(remaining * 1000))
+
+    def is_valid(self, seq):
+        """True if the slot holding seq has not been overwritten since it was read"""
+        return int(self.meta["seq"][seq % self.slots]) == seq
+
+    def close(self):
+        self.listener.close()
+        del self.meta, self.frames
+        self.shm.close()
+
+
+class FrameBusSubscription:
+    """cv2.VideoCapture-style read() over the frame bus, for agents in worker processes"""
+
+    def __init__(self, name=DEFAULT_BUS_NAME, notify_endpoint=DEFAULT_NOTIFY_ENDPOINT, timeout=1.0):
+        self.reader = FrameBusReader(name, notify_endpoint)
+        self.timeout = timeout
+        self.last_timestamp = None
+        self.opened = True
+
+    def isOpened(self):
+        return self.opened
+
+    def read(self, copy=True):
+        """Return (ret, frame); copy=False hands out the read-only shared view
+
+        ret is False only when no intact frame arrived within the timeout.
+        """
+        deadline = time.time() + self.timeout
+        while True:
+            item = self.reader.read(max(0.0, deadline - time.time()))
+            if item is None:
+                return False, None
+            seq, self.last_timestamp, view = item
+            if not copy:
+                return True, view
+            frame = view.copy()
+            if self.reader.is_valid(seq):
+                return True, frame
+            self.reader.torn_reads += 1  # Overwritten during the copy; take the next frame
+
+    def release(self):
+        if self.opened:
+            self.opened = False
+            self.reader.close()
+
+
+def produce(device=0, name=DEFAULT_BUS_NAME, notify_endpoint=DEFAULT_NOTIFY_ENDPOINT, slots=4):
+    """Feed the bus from the shared camera service until interrupted"""
+    from core.camera_service import get_camera_service
+
+    camera = get_camera_service(device).subscribe()
+    ret, frame = camera.read(copy=False)
+    if not ret:
+        raise RuntimeError("Camera error")
+
+    writer = FrameBusWriter(frame.shape, frame.dtype, slots, name, notify_endpoint)
+    try:
+        while ret:
+            writer.write(frame, camera.last_timestamp)
+            ret, frame = camera.read(copy=False)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"[FrameBus] Producer stopped after {writer.seq} frames")
+        writer.close()
+        camera.release()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="VisionAID shared-memory frame bus")
+    parser.add_argument("command", choices=["produce"])
+    parser.add_argument("--device", type=int, default=0)
+    parser.add_argument("--name", default=DEFAULT_BUS_NAME)
+    parser.add_argument("--endpoint", default=DEFAULT_NOTIFY_ENDPOINT)
+    parser.add_argument("--slots", type=int, default=4)
+    args = parser.parse_args(argv)
+    produce(args.device, args.name, args.endpoint, args.slots)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
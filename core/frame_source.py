@@ -0,0 +1,176 @@
+"""Pluggable frame sources for vision agents
+
+Every source has the cv2.VideoCapture read()/release()/isOpened() interface,
+so agents do not care whether frames come from the live camera or a replay.
+Sources are chosen with a short spec string:
+
+    camera            shared live camera 0 (default)
+    camera:1          shared live camera 1
+    video:clip.mp4    video file
+    images:frames/    directory of images, in name order
+    synthetic         generated test pattern (synthetic:640x480)
+
+Replays run as fast as possible unless realtime=True, and their timestamps are
+derived from the frame index and fps, so repeated runs produce identical
+timing metadata.
+"""
+import os
+import time
+
+import cv2
+import numpy as np
+
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+class ReplaySource:
+    """Base for file and generated sources with deterministic timestamps"""
+
+    def __init__(self, fps=30.0, realtime=False, loop=False, max_frames=None):
+        self.fps = fps
+        self.realtime = realtime  # Pace frames at fps instead of as fast as possible
+        self.loop = loop
+        self.max_frames = max_frames
+        self.frame_index = 0
+        self.last_timestamp = None
+        self.opened = True
+        self._started = None
+
+    def isOpened(self):
+        return self.opened
+
+    def _next_frame(self):
+        """Return the next raw frame or None at the end (subclasses)"""
+        raise NotImplementedError
+
+    def _rewind(self):
+        raise NotImplementedError
+
+    def _pace(self):
+        if self._started is None:
+            self._started = time.monotonic()
+            return
+        due = self._started + self.frame_index / self.fps
+        delay = due - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def read(self):
+        if not self.opened or (self.max_frames is not None and self.frame_index >= self.max_frames):
+            return False, None
+
+        frame = self._next_frame()
+        if frame is None and self.loop and self.frame_index > 0:
+            self._rewind()
+            frame = self._next_frame()
+        if frame is None:
+            return False, None
+
+        if self.realtime:
+            self._pace()
+        self.last_timestamp = self.frame_index / self.fps
+        self.frame_index += 1
+        return True, frame
+
+    def release(self):
+        self.opened = False
+
+
+class VideoFileSource(ReplaySource):
+    """Frames from a video file"""
+
+    def __init__(self, path, fps=None, **kwargs):
+        self.path = path
+        self.capture = cv2.VideoCapture(path)
+        if not self.capture.isOpened():
+            raise RuntimeError(f"Could not open video {path}")
+        fps = fps or self.capture.get(cv2.CAP_PROP_FPS) or 30.0
+        super().__init__(fps=fps, **kwargs)
+
+    def _next_frame(self):
+        ret, frame = self.capture.read()
+        return frame if ret else None
+
+    def _rewind(self):
+        self.capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+
+    def release(self):
+        super().release()
+        self.capture.release()
+
+
+class ImageSequenceSource(ReplaySource):
+    """Frames from a directory of still images, sorted by file name"""
+
+    def __init__(self, directory, **kwargs):
+        super().__init__(**kwargs)
+        self.paths = sorted(
+            os.path.join(directory, name) for name in os.listdir(directory)
+            if name.lower().endswith(IMAGE_EXTENSIONS)
+        )
+        if not self.paths:
+            raise RuntimeError(f"No images found in {directory}")
+        self.position = 0
+
+    def _next_frame(self):
+        while self.position < len(self.paths):
+            frame = cv2.imread(self.paths[self.position])
+            self.position += 1
+            if frame is not None:
+                return frame
+            print(f"[FrameSource] Skipping unreadable image {self.paths[self.position - 1]}")
+        return None
+
+    def _rewind(self):
+        self.position = 0
+
+
+class SyntheticSource(ReplaySource):
+    """Deterministic generated frames: a noisy background with a moving box"""
+
+    def __init__(self, width=640, height=480, seed=0, **kwargs):
+        super().__init__(**kwargs)
+        self.width = width
+        self.height = height
+        rng = np.random.default_rng(seed)
+        self.background = rng.integers(0, 64, (height, width, 3), dtype=np.uint8)
+
+    def _next_frame(self):
+        frame = self.background.copy()
+        size = min(self.width, self.height) // 4
+        x = (self.frame_index * 8) % max(1, self.width - size)
+        y = self.height // 2 - size // 2
+        cv2.rectangle(frame, (x, y), (x + size, y + size), (255, 255, 255), -1)
+        return frame
+
+    def _rewind(self):
+        pass
+
+
+def open_frame_source(spec=None, **kwargs):
+    """Open a frame source from a spec string (see module docstring)
+
+    Defaults to VISIONAID_FRAME_SOURCE, then the shared live camera. Extra
+    keyword arguments (fps, realtime, loop, max_frames) apply to replays.
+    An already opened source is returned unchanged.
+    """
+    if hasattr(spec, "read"):
+        return spec
+    spec = spec or os.environ.get("VISIONAID_FRAME_SOURCE") or "camera"
+    kind, _, arg = spec.partition(":")
+
+    if kind == "camera":
+        from core.utils import get_camera
+        return get_camera(int(arg) if arg else 0)
+    if kind == "video":
+        return VideoFileSource(arg, **kwargs)
+    if kind == "images":
+        return ImageSequenceSource(arg, **kwargs)
+    if kind == "synthetic":
+        if arg:
+            width, height = (int(v) for v in arg.lower().split("x"))
+            kwargs.setdefault("width", width)
+            kwargs.setdefault("height", height)
+        return SyntheticSource(**kwargs)
+    raise ValueError(f"Unknown frame source '{spec}'")
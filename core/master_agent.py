@@ -2,33 +2,55 @@ import cv2
 import time
 import zmq
 import threading
+import importlib
+import json
+import os
 import numpy as np
-from agents.vision_agent.barcode_reader import BarcodeReaderAgent
-from agents.ecommerce_agent.ecommerce_agent import EcommerceAgent
-from agents.vision_agent.object_detection import ObjectDetectionAgent
-from agents.vision_agent.document_ocr import DocumentOCRAgent
-from agents.navigation.navigation_agent import NavigationAgent
-from agents.vision_agent.emotion_detection_agent import EmotionDetectionAgent
-from core.utils import speak
+from core.utils import speak, PRIORITY_URGENT, PRIORITY_LOW
 from threading import Thread
 from core.mcp_logger import MCPLogger
-
+from core.agent_worker import AgentSupervisor, HEARTBEAT_AGENT
+from core.vision_pipeline import PIPELINES, VisionPipeline
+from core.mcp_protocol import receive, subscribe
+from core.mcp_inbox import MessageInbox
+from core.mcp_transport import get_socket
+from core.metrics import metrics
+from core import tracing
+
+
+# Agent name -> (module, class, constructor kwargs). Modules are imported on
+# first use so unused agents never load their models.
+AGENT_FACTORIES = {
+    "object_detection": ("agents.vision_agent.object_detection", "ObjectDetectionAgent", {"motion_gate": True}),
+    "barcode_scanner": ("agents.vision_agent.barcode_reader", "BarcodeReaderAgent", {"motion_gate": True}),
+    "document_reader": ("agents.vision_agent.document_ocr", "DocumentOCRAgent", {}),
+    "navigation": ("agents.navigation.navigation_agent", "NavigationAgent", {}),
+    "ecommerce_agent": ("agents.ecommerce_agent.ecommerce_agent", "EcommerceAgent", {}),
+    "emotion_detection_agent": ("agents.vision_agent.emotion_detection_agent", "EmotionDetectionAgent",
+                                {"motion_gate": True}),
+}
+
+USAGE_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                          "memory", "agent_usage.json")
 
 
 class MasterAgent:
-    def __init__(self):
-        # Initialize all sub-agents
-        self.agents = {
-            "object_detection": ObjectDetectionAgent(),
-            "barcode_scanner": BarcodeReaderAgent(),
-            "document_reader": DocumentOCRAgent(),
-            "navigation": NavigationAgent(),
-            "ecommerce_agent": EcommerceAgent(),
-            "emotion_detection_agent": EmotionDetectionAgent()
-        }
-
-        self.current_agent = None
+    def __init__(self, prewarm=None, prewarm_limit=2, process_mode=False, metrics_port=None):
+        # Sub-agents are built on first use (see get_agent)
+        self.agent_factories = dict(AGENT_FACTORIES)
+        self.agents = {}
+        self.agent_locks = {name: threading.Lock() for name in self.agent_factories}
+        self.agent_load_times = {}
+        self.agent_usage = self._load_usage()
+
+        # Optional: run each agent in its own supervised worker process
+        self.process_mode = process_mode
+        self.supervisor = AgentSupervisor() if process_mode else None
+
+        self._current_agent = None
         self.running = True
+        self.cleaned_up = False  # cleanup() is reached from several exit paths; runs once
+        self.cleanup_lock = threading.Lock()
         self.agent_busy = False
         self.logger = MCPLogger()
 
@@ -37,31 +59,153 @@ class MasterAgent:
         self.last_switch_time = 0
         self.help_cooldown = 5  # seconds
 
+        # Status window: redrawn when something changes, at most status_max_fps,
+        # and every status_refresh seconds so the "ago" times stay current
+        self.status_canvas = np.zeros((350, 700, 3), dtype=np.uint8)
+        self.status_dirty = threading.Event()
+        self.status_dirty.set()
+        self.status_max_fps = 10
+        self.status_refresh = 1.0
+        self.status_poll_ms = 50  # cv2.waitKey timeout: keeps the window responsive while idle
+        self.last_render = 0.0
+        self.render_count = 0
+        self.render_seconds = 0.0
+        self.last_render_ms = 0.0
+
         # Thread safety
         self.lock = threading.Lock()
 
-        # MCP Integration
-        self._start_vision_listener()
-        self.message_queue = []
+        # MCP Integration: the listener only enqueues, the consumer handles
+        self.inbox = MessageInbox()
         self.last_messages = {}
+        self._start_vision_listener()
+        Thread(target=self._consume_messages, daemon=True, name="MCPConsumer").start()
+
+        # Metrics: periodic snapshots into the log DB, optional HTTP endpoint
+        metrics.start_snapshots(self.logger)
+        metrics_port = metrics_port or os.environ.get("VISIONAID_METRICS_PORT")
+        if metrics_port:
+            metrics.serve(int(metrics_port))
+
+        # Optional background prewarm: "usage" (most used first) or a list of names
+        if prewarm and not process_mode:
+            self.prewarm(prewarm, prewarm_limit)
+
+    @property
+    def current_agent(self):
+        return self._current_agent
+
+    @current_agent.setter
+    def current_agent(self, agent):
+        self._current_agent = agent
+        self.status_dirty.set()
+
+    def _load_usage(self):
+        try:
+            with open(USAGE_FILE) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _record_usage(self, agent_name):
+        self.agent_usage[agent_name] = self.agent_usage.get(agent_name, 0) + 1
+        try:
+            os.makedirs(os.path.dirname(USAGE_FILE), exist_ok=True)
+            with open(USAGE_FILE, "w") as f:
+                json.dump(self.agent_usage, f)
+        except OSError as e:
+            print(f"[Master] Could not save agent usage: {e}")
+
+    def get_agent(self, agent_name):
+        """Return the named agent, constructing it on first use
+
+        Model loading and the dummy warmup inference happen in the agent
+        class's preload() (see preload_models), not here.
+        """
+        if agent_name not in self.agent_factories:
+            return None
+        agent = self.agents.get(agent_name)
+        if agent is not None:
+            return agent
+
+        with self.agent_locks[agent_name]:
+            if agent_name in self.agents:  # Built by the prewarm thread meanwhile
+                return self.agents[agent_name]
+
+            module_name, class_name, kwargs = self.agent_factories[agent_name]
+            started = time.time()
+            agent_class = getattr(importlib.import_module(module_name), class_name)
+            agent = agent_class(**kwargs)
+
+            self.agent_load_times.setdefault(agent_name, {})["load"] = time.time() - started
+            self.agents[agent_name] = agent
+            print(f"[Master] Loaded {agent_name} in {time.time() - started:.2f}s")
+            return agent
+
+    def preload_models(self, agent_name):
+        """Load and warm up an agent's models (class preload()) without building the agent
+
+        Building one would create its publisher, speech engine and so on for
+        an agent the user may never start; the models are the slow part.
+        """
+        module_name, class_name, _ = self.agent_factories[agent_name]
+        started = time.time()
+        agent_class = getattr(importlib.import_module(module_name), class_name)
+        if hasattr(agent_class, 'preload'):
+            agent_class.preload()
+        self.agent_load_times.setdefault(agent_name, {})["preload"] = time.time() - started
+        print(f"[Master] Preloaded models for {agent_name} in {time.time() - started:.2f}s")
+
+    def prewarm(self, policy="usage", limit=2):
+        """Load agents' models in the background so the first switch is fast"""
+        if policy == "usage":
+            names = sorted(self.agent_usage, key=self.agent_usage.get, reverse=True)
+            names = [name for name in names if name in self.agent_factories][:limit]
+        else:
+            names = [name for name in policy if name in self.agent_factories]
+
+        def _prewarm():
+            for name in names:
+                if not self.running:
+                    break
+                try:
+                    self.preload_models(name)
+                except Exception as e:
+                    print(f"[Master] Prewarm of {name} failed: {e}")
+
+        if names:
+            Thread(target=_prewarm, daemon=True, name="AgentPrewarm").start()
+        return names
+
+    def startup_report(self):
+        """Per-agent model preload (load + warmup) and construction times in seconds"""
+        return dict(self.agent_load_times)
 
     def _start_vision_listener(self):
         """Start ZeroMQ listener in a background thread"""
 
         def _listen():
-            context = zmq.Context()
-            subscriber = context.socket(zmq.SUB)
-            subscriber.bind("tcp://*:5555")
-            subscriber.setsockopt_string(zmq.SUBSCRIBE, '')
+            subscriber = get_socket(zmq.SUB, "tcp://*:5555", bind=True)
+            subscribe(subscriber)  # Every agent topic plus legacy JSON senders
 
             while self.running:
                 try:
-                    msg = subscriber.recv_json()
-                    with self.lock:
-                        self._handle_vision_message(msg)
+                    msg = receive(subscriber)
+
+                    if not isinstance(msg, dict):
+                        raise ValueError("Invalid message format")
+
+                    # Worker liveness is tracked without touching the main lock
+                    if msg.get("agent") == HEARTBEAT_AGENT:
+                        if self.supervisor:
+                            self.supervisor.record_heartbeat(msg.get("data", {}))
+                        continue
+
+                    tracing.mark(msg.get("trace"), "received")
+                    self.inbox.put(msg)
                 except zmq.ZMQError as e:
                     if self.running:
-                        speak(f"Communication error: {str(e)}")
+                        speak(f"Communication error: {str(e)}", priority=PRIORITY_URGENT)
                         self.logger.log_error(f"ZMQ Error: {str(e)}")
                 except Exception as e:
                     error_msg = f"Message handling error: {str(e)}"
@@ -70,6 +214,15 @@ class MasterAgent:
 
         Thread(target=_listen, daemon=True).start()
 
+    def _consume_messages(self):
+        """Handle queued agent messages off the listener thread"""
+        while self.running:
+            msg = self.inbox.get(timeout=0.5)
+            if msg is not None:
+                with metrics.timer("master.handle_seconds"):
+                    self._handle_vision_message(msg)
+                metrics.gauge("master.inbox_queued").set(self.inbox.stats()["queued"])
+
     def _handle_vision_message(self, msg):
         """Process incoming messages from agents"""
         try:
@@ -79,38 +232,50 @@ class MasterAgent:
             agent_type = msg.get("agent", "unknown")
             data = msg.get("data", {})
             timestamp = msg.get("timestamp", time.time())
+            trace = tracing.mark(msg.get("trace"), "handled")
+            utterance = None
+            metrics.counter(f"master.messages.{agent_type}").inc()
+            metrics.histogram("master.message_age_seconds").observe(max(0.0, time.time() - timestamp))
 
             # Store last message from each agent
             self.last_messages[agent_type] = {
                 "data": data,
                 "timestamp": timestamp
             }
+            self.status_dirty.set()
 
             # Log to database
-            self.logger.insert_message({
-                "agent": agent_type,
-                "data": data,
-                "timestamp": timestamp
-            })
+            with metrics.timer("master.log_seconds"):
+                self.logger.insert_message({
+                    "agent": agent_type,
+                    "data": data,
+                    "timestamp": timestamp
+                })
+            tracing.mark(trace, "logged")
 
             # Agent-specific processing
             if agent_type == "barcode":
                 product = data.get("product", "unknown product")
-                speak(f"Barcode scanned: {product}")
+                utterance = speak(f"Barcode scanned: {product}", kind="barcode", trace=trace)
 
             elif agent_type == "document":
                 text = data.get("text", "")[:100]  # First 100 chars
-                speak(f"Document text recognized: {text}")
+                utterance = speak(f"Document text recognized: {text}", kind="document", trace=trace)
 
             elif agent_type == "object":
                 objects = data.get("objects", [])
                 if objects:
-                    speak(f"Detected objects: {', '.join(objects[:3])}")
+                    utterance = speak(f"Detected objects: {', '.join(objects[:3])}",
+                                      priority=PRIORITY_LOW, kind="object", max_age=5, trace=trace)
 
             elif agent_type == "emotion":
                 emotion = data.get("top_emotion", "unknown")
                 confidence = data.get("confidence", 0)
-                speak(f"Detected emotion: {emotion} ({(confidence * 100):.1f}% confidence)")
+                utterance = speak(f"Detected emotion: {emotion} ({(confidence * 100):.1f}% confidence)",
+                                  priority=PRIORITY_LOW, kind="emotion", max_age=5, trace=trace)
+
+            if utterance is None:
+                tracing.finish(trace, "no_speech")
 
         except Exception as e:
             error_msg = f"Error handling message: {str(e)}"
@@ -120,21 +285,20 @@ class MasterAgent:
     def run(self):
         try:
             while self.running:
-                self.display_status()
-
-                # Process any queued messages
-                with self.lock:
-                    if self.message_queue:
-                        msg = self.message_queue.pop(0)
-                        self._handle_vision_message(msg)
-
-                # Press Q to exit
-                if cv2.waitKey(1) & 0xFF == ord('q'):
+                now = time.time()
+                since_render = now - self.last_render
+                if ((self.status_dirty.is_set() and since_render >= 1.0 / self.status_max_fps) or
+                        since_render >= self.status_refresh):
+                    self.status_dirty.clear()
+                    self.display_status()
+
+                # Press Q to exit (waitKey also paces the loop)
+                if cv2.waitKey(self.status_poll_ms) & 0xFF == ord('q'):
                     self.shutdown()
                     break
 
         except Exception as e:
-            speak(f"System error: {str(e)}")
+            speak(f"System error: {str(e)}", priority=PRIORITY_URGENT, wait=True)
             raise
         finally:
             self.cleanup()
@@ -145,15 +309,31 @@ class MasterAgent:
                 if self.current_agent:
                     self.current_agent.terminate()
                     time.sleep(0.5)
+                    # Don't leave the dead agent current if building the new one fails
+                    self.current_agent = None
+
+                if agent_name in PIPELINES:
+                    # Several vision agents at once on one frame stream
+                    speak(f"Switched to {agent_name.replace('_', ' ')}", kind="switch")
+                    self.last_switch_time = time.time()
+                    self.current_agent = VisionPipeline(agent_name, self.get_agent)
+                    self.current_agent.run_non_blocking()
+                    return
 
-                self.current_agent = self.agents.get(agent_name)
-                if not self.current_agent:
+                if agent_name not in self.agent_factories:
                     speak("Unknown agent requested.")
                     return
 
-                speak(f"Switched to {agent_name.replace('_', ' ')}")
+                speak(f"Switched to {agent_name.replace('_', ' ')}", kind="switch")
+                self._record_usage(agent_name)
                 self.last_switch_time = time.time()
 
+                if self.process_mode:
+                    # The worker builds and runs the agent; results arrive over MCP
+                    self.current_agent = self.supervisor.start(agent_name)
+                    return
+
+                self.current_agent = self.get_agent(agent_name)
                 if hasattr(self.current_agent, 'run_non_blocking'):
                     self.current_agent.run_non_blocking()
                 else:
@@ -163,11 +343,14 @@ class MasterAgent:
                 speak(f"Failed to switch agents: {str(e)}")
 
     def display_status(self):
-        overlay = np.zeros((350, 700, 3), dtype=np.uint8)  # Slightly larger window
+        started = time.perf_counter()
+        overlay = self.status_canvas
+        overlay.fill(0)
 
         # Current agent status
         if self.current_agent:
-            status_text = f"Active: {type(self.current_agent).__name__}"
+            name = getattr(self.current_agent, 'display_name', type(self.current_agent).__name__)
+            status_text = f"Active: {name}"
             cv2.putText(overlay, status_text, (50, 80),
                         cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
 
@@ -176,7 +359,7 @@ class MasterAgent:
         cv2.putText(overlay, "Last Events:", (50, y_offset),
                     cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1)
 
-        for agent, info in self.last_messages.items():
+        for agent, info in list(self.last_messages.items()):
             y_offset += 30
             elapsed = time.time() - info['timestamp']
             summary = self._summarize_message(agent, info['data'])
@@ -207,6 +390,20 @@ class MasterAgent:
 
         cv2.imshow("VisionAI Control", overlay)
 
+        self.last_render = time.time()
+        self.last_render_ms = (time.perf_counter() - started) * 1000
+        self.render_count += 1
+        self.render_seconds += self.last_render_ms / 1000
+        metrics.histogram("master.render_seconds").observe(self.last_render_ms / 1000)
+
+    def render_stats(self):
+        """Status window render cost"""
+        return {
+            "renders": self.render_count,
+            "last_ms": self.last_render_ms,
+            "mean_ms": self.render_seconds * 1000 / self.render_count if self.render_count else 0.0,
+        }
+
     def _summarize_message(self, agent, data):
         """Create a short summary of agent messages"""
         if agent == "barcode":
@@ -218,21 +415,40 @@ class MasterAgent:
         return "activity detected"
 
     def shutdown(self):
-        speak("Shutting down all systems")
+        speak("Shutting down all systems", priority=PRIORITY_URGENT, wait=True)
         self.running = False
         self.cleanup()
 
     def cleanup(self):
-        """Cleanup resources"""
-        for agent in self.agents.values():
+        """Cleanup resources (only the first call does anything)"""
+        with self.cleanup_lock:
+            if self.cleaned_up:
+                return
+            self.cleaned_up = True
+        self.inbox.close()
+        metrics.shutdown()
+        self.logger.insert_metrics(metrics.snapshot())  # Final snapshot
+        tracing.writer.flush()
+        for agent in list(self.agents.values()):
             if hasattr(agent, 'terminate'):
                 agent.terminate()
+        if self.supervisor:
+            self.supervisor.shutdown()
         cv2.destroyAllWindows()
         self.logger.close_connection()
 
 
 if __name__ == "__main__":
-    master = MasterAgent()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="VisionAID master agent")
+    parser.add_argument("--process-mode", action="store_true",
+                        help="Run each agent in its own supervised worker process")
+    parser.add_argument("--metrics-port", type=int,
+                        help="Serve metrics as text on http://127.0.0.1:PORT/metrics")
+    args = parser.parse_args()
+
+    master = MasterAgent(process_mode=args.process_mode, metrics_port=args.metrics_port)
     try:
         master.run()
     except KeyboardInterrupt:
@@ -0,0 +1,211 @@
+import hashlib
+import json
+import threading
+import time
+from collections import defaultdict, deque
+
+import zmq
+
+from core.mcp_protocol import publish, validate_payload
+from core.mcp_transport import get_socket
+from core.tracing import mark, finish
+
+
+DEFAULT_MCP_ENDPOINT = "tcp://localhost:5555"
+
+# Most messages per second each topic may put on the bus (None = unlimited)
+MAX_RATES = {"object": 2.0, "emotion": 1.0, "barcode": 5.0, "document": 1.0}
+DEFAULT_MAX_RATE = 2.0
+
+# Topics that report current state: only the newest payload matters and an
+# unchanged one is not repeated. Other topics carry events (each scan or
+# document read), which are queued in order and never suppressed.
+COALESCE_TOPICS = {"object", "emotion"}
+
+
+def _fingerprint(data):
+    encoded = json.dumps(data, sort_keys=True, separators=(",", ":"),
+                         default=lambda v: v.tolist() if hasattr(v, "tolist") else list(v))
+    return hashlib.sha1(encoded.encode("utf-8")).digest()
+
+
+class MCPPublisher:
+    """Shared MCP publishing client for agents
+
+    publish() never blocks: it records the payload and returns. A sender
+    thread puts it on the bus; no topic publishes faster than its max rate.
+
+    On state topics (coalesce_topics) the sender waits out the aggregation
+    window, so a burst of per-frame results becomes one message carrying the
+    newest one, and payloads whose key (by default the payload itself)
+    matches the last message sent are suppressed until resend_after seconds
+    have passed. Event topics are sent first in, first out, without
+    suppression; only the oldest are dropped if max_events pile up.
+    """
+
+    def __init__(self, endpoint=DEFAULT_MCP_ENDPOINT, source="vision", window=0.25,
+                 max_rates=MAX_RATES, default_max_rate=DEFAULT_MAX_RATE, resend_after=30.0,
+                 coalesce_topics=COALESCE_TOPICS, max_events=32):
+        self.endpoint = endpoint
+        self.source = source
+        self.window = window
+        self.max_rates = dict(max_rates)
+        self.default_max_rate = default_max_rate
+        self.resend_after = resend_after
+        self.coalesce_topics = set(coalesce_topics)
+        self.max_events = max_events
+
+        self.socket = get_socket(zmq.PUB, endpoint)  # Cached: survives publisher restarts
+
+        self.cond = threading.Condition()
+        self.pending = {}  # agent -> deque of (data, timestamp, fingerprint, trace)
+        self.due = {}  # agent -> when the head of its queue may be sent (0.0 = flush all)
+        self.last_sent = {}  # agent -> (fingerprint, sent_at)
+        self.counts = defaultdict(lambda: {"submitted": 0, "published": 0, "suppressed": 0,
+                                           "superseded": 0, "dropped": 0})
+        self.running = True
+        self.thread = threading.Thread(target=self._send_loop, daemon=True, name="MCPPublisher")
+        self.thread.start()
+
+    def _min_interval(self, agent):
+        rate = self.max_rates.get(agent, self.default_max_rate)
+        return 1.0 / rate if rate else 0.0
+
+    def _unchanged(self, agent, fingerprint, now):
+        last = self.last_sent.get(agent)
+        return (last is not None and last[0] == fingerprint and
+                (self.resend_after is None or now - last[1] < self.resend_after))
+
+    def publish(self, agent, data, key=None, timestamp=None, trace=None):
+        """Queue a payload for the agent's topic; returns False if it was suppressed
+
+        key identifies what the payload means (e.g. the set of objects), so
+        jitter in other fields such as box coordinates doesn't count as a change.
+        trace (core.tracing) rides along with the message if it is sent, and
+        is finished here if the payload is suppressed, superseded or dropped.
+        """
+        validate_payload(agent, data)
+        now = time.time()
+        coalesce = agent in self.coalesce_topics
+        fingerprint = _fingerprint(data if key is None else key) if coalesce else None
+        timestamp = now if timestamp is None else timestamp
+
+        with self.cond:
+            counts = self.counts[agent]
+            counts["submitted"] += 1
+            queue = self.pending.get(agent)
+            if coalesce:
+                if not queue and self._unchanged(agent, fingerprint, now):
+                    counts["suppressed"] += 1
+                    finish(trace, "suppressed")
+                    return False
+                if queue:
+                    counts["superseded"] += len(queue)
+                    for entry in queue:
+                        finish(entry[3], "superseded")
+                    queue.clear()
+            elif queue and len(queue) >= self.max_events:
+                counts["dropped"] += 1
+                finish(queue.popleft()[3], "dropped")
+
+            if queue is None:
+                queue = self.pending[agent] = deque()
+            if agent not in self.due:
+                last = self.last_sent.get(agent)
+                due = now + self.window if coalesce else now
+                if last is not None:
+                    due = max(due, last[1] + self._min_interval(agent))
+                self.due[agent] = due
+            queue.append((data, timestamp, fingerprint, trace))
+            self.cond.notify()
+        return True
+
+    def _send_loop(self):
+        while True:
+            with self.cond:
+                while self.running and not self._due(time.time()):
+                    next_due = min(self.due.values(), default=None)
+                    self.cond.wait(None if next_due is None else max(0.0, next_due - time.time()))
+                now = time.time()
+                ready = self._due(now) if self.running else list(self.pending)
+                batch = []
+                for agent in ready:
+                    queue = self.pending[agent]
+                    # Flushed or closing: send the whole queue; otherwise one per interval
+                    drain = not self.running or self.due[agent] == 0.0
+                    entries = list(queue) if drain else [queue.popleft()]
+                    if drain:
+                        queue.clear()
+                    for data, timestamp, fingerprint, trace in entries:
+                        if agent in self.coalesce_topics and self._unchanged(agent, fingerprint, now):
+                            self.counts[agent]["suppressed"] += 1
+                            finish(trace, "suppressed")
+                            continue
+                        self.last_sent[agent] = (fingerprint, now)
+                        batch.append((agent, data, timestamp, trace))
+                    if queue:
+                        self.due[agent] = now + self._min_interval(agent)
+                    else:
+                        del self.pending[agent]
+                        del self.due[agent]
+                stopping = not self.running
+
+            for agent, data, timestamp, trace in batch:
+                try:
+                    publish(self.socket, agent, data, self.source, timestamp, zmq.NOBLOCK, validate=False,
+                            trace=mark(trace, "publish"))
+                    outcome = "published"
+                except zmq.ZMQError:
+                    outcome = "dropped"  # Bus unreachable or full; newer results will follow
+                    finish(trace, "dropped")
+                except Exception as e:
+                    print(f"[MCP ERROR] Could not send {agent} message: {e}")
+                    outcome = "dropped"  # e.g. a payload the codec can't pack; keep the thread alive
+                    finish(trace, "dropped")
+                with self.cond:
+                    self.counts[agent][outcome] += 1
+
+            if stopping:
+                return
+
+    def _due(self, now):
+        return [agent for agent, due in self.due.items() if due <= now]
+
+    def flush(self):
+        """Make every pending payload due now"""
+        with self.cond:
+            for agent in self.due:
+                self.due[agent] = 0.0
+            self.cond.notify()
+
+    def close(self):
+        """Send what is pending and stop the sender thread"""
+        with self.cond:
+            self.running = False
+            self.cond.notify()
+        self.thread.join(2)
+
+    def stats(self):
+        with self.cond:
+            return {agent: dict(counts) for agent, counts in self.counts.items()}
+
+
+_publisher = None
+_publisher_lock = threading.Lock()
+
+
+def get_publisher():
+    """Process-wide publisher shared by every agent"""
+    global _publisher
+    with _publisher_lock:
+        if _publisher is None or not _publisher.running or not _publisher.thread.is_alive():
+            _publisher = MCPPublisher()
+        return _publisher
+
+
+def close_publisher():
+    """Send what the shared publisher still holds and stop it"""
+    with _publisher_lock:
+        publisher = _publisher
+    if publisher is not None:
+        publisher.close()
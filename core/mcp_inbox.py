@@ -0,0 +1,105 @@
+import threading
+import time
+from collections import deque
+
+
+# Agents whose newest message supersedes any queued one (only the current scene matters)
+COALESCE_AGENTS = {"object", "emotion"}
+
+# Seconds after which a message is no longer worth handling
+MESSAGE_MAX_AGE = {"object": 3.0, "emotion": 3.0, "barcode": 15.0, "document": 30.0}
+DEFAULT_MAX_AGE = 10.0
+
+
+class MessageInbox:
+    """Bounded per-agent queues between the MCP listener and the master's handler
+
+    The listener only calls put(), which never blocks; a consumer thread
+    takes messages with get() in arrival order. Superseded and expired
+    messages are dropped instead of being handled late.
+    """
+
+    def __init__(self, max_per_agent=8, coalesce=COALESCE_AGENTS, max_age=MESSAGE_MAX_AGE,
+                 default_max_age=DEFAULT_MAX_AGE):
+        self.max_per_agent = max_per_agent
+        self.coalesce = set(coalesce)
+        self.max_age = dict(max_age)
+        self.default_max_age = default_max_age
+        self.queues = {}  # agent -> deque of (arrival seq, received_at, msg)
+        self.cond = threading.Condition()
+        self.seq = 0
+        self.closed = False
+
+        # Counters
+        self.received = 0
+        self.handled = 0
+        self.coalesced = 0
+        self.overflowed = 0
+        self.expired = 0
+
+    def put(self, msg):
+        agent = msg.get("agent", "unknown")
+        with self.cond:
+            queue = self.queues.get(agent)
+            if queue is None:
+                queue = self.queues[agent] = deque()
+            if agent in self.coalesce:
+                self.coalesced += len(queue)
+                queue.clear()
+            elif len(queue) >= self.max_per_agent:
+                queue.popleft()  # Oldest goes first
+                self.overflowed += 1
+            self.seq += 1
+            self.received += 1
+            queue.append((self.seq, time.time(), msg))
+            self.cond.notify()
+
+    def _age(self, received_at, msg, now):
+        timestamp = msg.get("timestamp")
+        sent_at = timestamp if isinstance(timestamp, (int, float)) else received_at
+        return now - min(sent_at, received_at)
+
+    def _pop_oldest(self):
+        """Next live message across agents, dropping expired ones (lock held)"""
+        now = time.time()
+        while True:
+            heads = [(queue[0][0], agent) for agent, queue in self.queues.items() if queue]
+            if not heads:
+                return None
+            _, agent = min(heads)
+            _, received_at, msg = self.queues[agent].popleft()
+            if self._age(received_at, msg, now) > self.max_age.get(agent, self.default_max_age):
+                self.expired += 1
+                continue
+            self.handled += 1
+            return msg
+
+    def get(self, timeout=None):
+        """Wait for the next message; returns None on timeout or close"""
+        deadline = None if timeout is None else time.time() + timeout
+        with self.cond:
+            while not self.closed:
+                msg = self._pop_oldest()
+                if msg is not None:
+                    return msg
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self.cond.wait(remaining)
+            return None
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+    def stats(self):
+        with self.cond:
+            return {
+                "queued": sum(len(queue) for queue in self.queues.values()),
+                "received": self.received,
+                "handled": self.handled,
+                "coalesced": self.coalesced,
+                "overflowed": self.overflowed,
+                "expired": self.expired,
+            }
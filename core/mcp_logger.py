@@ -1,23 +1,123 @@
+import gzip
+import json
 import sqlite3
 import threading
 import time
-from datetime import datetime
+import queue
+import zlib
+from datetime import datetime, timezone
+import math
 import os
+import re
+import shutil
+
+from core.mcp_protocol import pack, unpack, to_json
+
+
+# Payload fields whose values repeat across messages; stored once in log_values.
+# The first one is also referenced from vision_logs.content_id. Stored payloads
+# refer to these by position, so only ever append to a tuple.
+INTERNED_FIELDS = {
+    "object": ("objects", "labels"),
+    "barcode": ("code", "product", "brand"),
+    "emotion": ("top_emotion",),
+}
+DATA_TYPES = {"barcode": "barcode", "document": "document", "object": "object",
+              "emotion": "emotion", "system": "error"}
+
+# Preset deflate dictionary: most payloads are a few dozen bytes, too short
+# for deflate to find repeats on its own. Never change it; add a new
+# payload format byte instead.
+PAYLOAD_ZDICT = (b'{"d":{"count":1,"boxes":{"__nd__":["<f4",[1,4],[]]},"scores":{"__nd__":["<f4",[1],[0.9]]},'
+                 b'"confidence":0.9,"char_count":,"text":"the "},"r":[null,1,2]}')
+PAYLOAD_RAW = b"\x00"
+PAYLOAD_DEFLATE = b"\x01"  # Raw deflate with PAYLOAD_ZDICT
 
 
 class MCPLogger:
-    def __init__(self, db_path='vision_logs.db'):
+    """SQLite log of MCP messages, errors and metrics
+
+    In write-behind mode (the default) insert calls only put a row on a
+    bounded queue; a writer thread commits rows in batches with executemany,
+    one transaction per batch, when batch_size rows are waiting or
+    flush_interval seconds have passed. The database runs in WAL mode with
+    synchronous=NORMAL, so a batch costs one fsync at checkpoint time rather
+    than one per message.
+
+    Reads go through query(), count() and counts_per_minute(). They use their
+    own read-only connections (WAL readers never block the writer) and see
+    committed rows only; call flush() first to include queued ones. Each
+    batch also bumps per-minute counts in log_counts_minute, so counts over
+    long ranges read a few aggregate rows instead of scanning raw logs.
+
+    The whole MCP payload is kept, losslessly, in vision_logs.payload: the
+    values of INTERNED_FIELDS are replaced by ids into log_values (each
+    distinct label list, emotion, code or product name is stored once), and
+    the rest is packed with the MCP codec and deflated with a preset
+    dictionary tuned for small payloads. query()
+    rebuilds the payload as row["data"]; content and additional_info are
+    derived from it and only stored for rows written before payloads.
+
+    Document text and barcode product names are also indexed in the FTS5
+    table log_search (rowid = vision_logs.id), kept in step with inserts and
+    expiry; search() ranks matches with BM25.
+
+    Raw rows are kept in day partitions (UTC days over the timestamp index).
+    run_maintenance() keeps the database bounded. The writer runs it every
+    maintenance_interval seconds, but only after claiming the run in the
+    log_maintenance table, so one logger does it per interval even when
+    several share the database:
+
+    * Days older than retention_days are archived to
+      <archive_dir>/vision_logs-YYYY-MM-DD.jsonl.gz, summarised into
+      log_summary_day (count per agent/type/content per day) and deleted.
+    * Per-minute counts older than rollup_days are merged into one row per
+      day, stored at the day's first minute.
+    * Freed pages are returned with an incremental vacuum and the WAL is
+      truncated. Databases created before incremental vacuum need a one-off
+      enable_incremental_vacuum() (a full VACUUM, so run it offline).
+    """
+
+    def __init__(self, db_path='vision_logs.db', write_behind=True, batch_size=256,
+                 flush_interval=0.5, max_queue=10000, retention_days=30, rollup_days=90,
+                 maintenance_interval=3600, archive_dir=None):
         self.db_path = os.path.abspath(db_path)
+        self.retention_days = retention_days
+        self.rollup_days = rollup_days
+        self.maintenance_interval = maintenance_interval
+        self.archive_dir = archive_dir or os.path.join(os.path.dirname(self.db_path), "log_archive")
+        self.next_maintenance = time.time() + 60  # Leave start-up alone
         self.conn = None
         self.lock = threading.Lock()
+        self.write_behind = write_behind
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.writer = None
+        self.value_ids = {}  # Interned value JSON -> log_values id
+        self.search_enabled = True
+
+        # Counters
+        self.rows_written = 0
+        self.rows_dropped = 0
+        self.batches = 0
+        self.rows_expired = 0
+
         print(f"[Logger Init] Using database at: {self.db_path}")
         self.initialize_database()
+        if write_behind:
+            self.writer = threading.Thread(target=self._write_loop, daemon=True, name="MCPLoggerWriter")
+            self.writer.start()
 
     def initialize_database(self):
         """Initialize database connection and tables"""
         with self.lock:
             try:
                 self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+                if not self.conn.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchone():
+                    self.conn.execute("PRAGMA auto_vacuum=INCREMENTAL")  # Only takes effect on a new file
+                self.conn.execute("PRAGMA journal_mode=WAL")
+                self.conn.execute("PRAGMA synchronous=NORMAL")  # Durable at checkpoints; safe with WAL
                 self.conn.execute('''
                     CREATE TABLE IF NOT EXISTS vision_logs (
                         id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -26,7 +126,66 @@ class MCPLogger:
                         data_type TEXT,
                         content TEXT,
                         confidence REAL,
-                        additional_info TEXT
+                        additional_info TEXT,
+                        content_id INTEGER,
+                        payload BLOB
+                    )
+                ''')
+                columns = {row[1] for row in self.conn.execute("PRAGMA table_info(vision_logs)")}
+                for column, kind in (("content_id", "INTEGER"), ("payload", "BLOB")):
+                    if column not in columns:
+                        self.conn.execute(f"ALTER TABLE vision_logs ADD COLUMN {column} {kind}")
+                self.conn.execute('''
+                    CREATE TABLE IF NOT EXISTS log_values (
+                        id INTEGER PRIMARY KEY,
+                        value TEXT NOT NULL UNIQUE
+                    )
+                ''')
+                self.conn.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_vision_logs_agent_time ON vision_logs (agent_type, timestamp)")
+                self.conn.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_vision_logs_type_time ON vision_logs (data_type, timestamp)")
+                self.conn.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_vision_logs_time ON vision_logs (timestamp)")
+                self.conn.execute('''
+                    CREATE TABLE IF NOT EXISTS log_counts_minute (
+                        minute INTEGER,
+                        agent_type TEXT,
+                        data_type TEXT,
+                        count INTEGER,
+                        PRIMARY KEY (minute, agent_type, data_type)
+                    ) WITHOUT ROWID
+                ''')
+                self._backfill_minute_counts()
+                self._create_search_index()
+                self.conn.execute('''
+                    CREATE TABLE IF NOT EXISTS log_summary_day (
+                        day INTEGER,
+                        agent_type TEXT,
+                        data_type TEXT,
+                        content TEXT,
+                        count INTEGER,
+                        confidence_sum REAL,
+                        PRIMARY KEY (day, agent_type, data_type, content)
+                    ) WITHOUT ROWID
+                ''')
+                self.conn.execute('''
+                    CREATE TABLE IF NOT EXISTS log_maintenance (
+                        id INTEGER PRIMARY KEY CHECK (id = 1),
+                        next_run REAL
+                    )
+                ''')
+                self.conn.execute("INSERT OR IGNORE INTO log_maintenance (id, next_run) VALUES (1, ?)",
+                                  (time.time() + 60,))  # Leave start-up alone
+                self.conn.execute('''
+                    CREATE TABLE IF NOT EXISTS metrics (
+                        timestamp REAL,
+                        name TEXT,
+                        kind TEXT,
+                        count INTEGER,
+                        value REAL,
+                        p50 REAL,
+                        p95 REAL
                     )
                 ''')
                 self.conn.commit()
@@ -35,97 +194,626 @@ class MCPLogger:
                 print(f"[Logger Init] Database initialization error: {str(e)}")
                 raise
 
-    def insert_message(self, msg):
-        """Insert a generic message into the database"""
-        print(f"[Logger] insert_message() called with: {msg}")
-        if not msg or "data" not in msg:
-            print("[Logger Warning] Skipping empty or invalid message.")
+    def _backfill_minute_counts(self):
+        """Build the per-minute counts once for logs written before they existed"""
+        if self.conn.execute("SELECT 1 FROM log_counts_minute LIMIT 1").fetchone():
             return
+        self.conn.execute('''
+            INSERT INTO log_counts_minute (minute, agent_type, data_type, count)
+            SELECT CAST(timestamp / 60 AS INTEGER), agent_type, data_type, COUNT(*)
+            FROM vision_logs WHERE timestamp IS NOT NULL
+            GROUP BY 1, 2, 3
+        ''')
 
-        if self.lock.acquire(timeout=2):
-            try:
-                agent_type = msg.get("agent", "unknown")
-                data = msg.get("data", {})
-
-                if agent_type == "barcode":
-                    content = data.get("code", "")
-                    data_type = "barcode"
-                    additional_info = f"{data.get('product', '')}|{data.get('brand', '')}"
-                elif agent_type == "document":
-                    content = data.get("text", "")[:500]
-                    data_type = "document"
-                    additional_info = str(len(content))
-                elif agent_type == "object":
-                    content = ",".join(data.get("objects", []))[:200]
-                    data_type = "object"
-                    additional_info = str(len(data.get("objects", [])))
-                elif agent_type == "emotion":
-                    content = data.get("top_emotion", "")
-                    data_type = "emotion"
-                    additional_info = str(data.get("confidence", 0))
+    def _create_search_index(self):
+        """Create log_search and index existing rows once (caller holds the lock)"""
+        if self.conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'log_search'").fetchone():
+            return
+        try:
+            self.conn.execute("CREATE VIRTUAL TABLE log_search USING fts5("
+                              "text, tokenize = 'porter unicode61 remove_diacritics 2')")
+        except sqlite3.OperationalError as e:
+            self.search_enabled = False
+            print(f"[Logger Init] Full-text search unavailable: {str(e)}")
+            return
+        cursor = self.conn.execute(f"SELECT {self._ROW_COLUMNS} FROM vision_logs "
+                                   "WHERE data_type IN ('document', 'barcode')")
+        values = {}
+        while True:
+            rows = cursor.fetchmany(1000)
+            if not rows:
+                break
+            entries = []
+            for row in self._decode_rows(self.conn, rows, values):
+                text = self._row_search_text(row)
+                if text:
+                    entries.append((row["id"], text))
+            self.conn.executemany("INSERT INTO log_search (rowid, text) VALUES (?, ?)", entries)
+
+    @staticmethod
+    def search_text(agent_type, data):
+        """Text indexed for search: document text, barcode product, brand and code"""
+        if not isinstance(data, dict):
+            return ""
+        if agent_type == "document":
+            return data.get("text") or ""
+        if agent_type == "barcode":
+            return " ".join(str(data[field]) for field in ("product", "brand", "code") if data.get(field))
+        return ""
+
+    def _row_search_text(self, row):
+        if row["data"] is not None:
+            return self.search_text(row["agent_type"], row["data"])
+        # Rows from before payloads were stored: only the (truncated) text columns
+        if row["data_type"] == "document":
+            return row["content"] or ""
+        if row["data_type"] == "barcode":
+            parts = (row["additional_info"] or "").split("|") + [row["content"]]
+            return " ".join(part for part in parts if part and part != "None")
+        return ""
+
+    _COUNT_SQL = '''
+        INSERT INTO log_counts_minute (minute, agent_type, data_type, count) VALUES (?, ?, ?, ?)
+        ON CONFLICT (minute, agent_type, data_type) DO UPDATE SET count = count + excluded.count
+    '''
+
+    _INSERT_SQL = {
+        "vision_logs": '''
+            INSERT INTO vision_logs (timestamp, agent_type, data_type, confidence, content_id, payload)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''',
+        "metrics": '''
+            INSERT INTO metrics (timestamp, name, kind, count, value, p50, p95)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''',
+    }
+
+    def _message_row(self, msg):
+        """Queued row for one MCP message; the writer encodes the payload"""
+        agent_type = msg.get("agent", "unknown")
+        data = msg.get("data", {})
+        confidence = data.get("confidence", 0) if isinstance(data, dict) else 0
+        return (msg.get("timestamp", time.time()), agent_type, DATA_TYPES.get(agent_type, "other"),
+                confidence, data)
+
+    @staticmethod
+    def describe(agent_type, data):
+        """(content, additional_info) summary of a payload, as shown in logs"""
+        if agent_type == "barcode":
+            return data.get("code", ""), f"{data.get('product', '')}|{data.get('brand', '')}"
+        if agent_type == "document":
+            text = data.get("text", "")
+            return text, str(len(text))
+        if agent_type == "object":
+            return ",".join(data.get("objects", [])), str(len(data.get("objects", [])))
+        if agent_type == "emotion":
+            return data.get("top_emotion", ""), str(data.get("confidence", 0))
+        if agent_type == "system":
+            return data.get("error", ""), ""
+        return str(data), ""
+
+    def _intern(self, value):
+        """log_values id for a str or list of str (caller holds the lock)"""
+        key = to_json(value)
+        value_id = self.value_ids.get(key)
+        if value_id is None:
+            self.conn.execute("INSERT OR IGNORE INTO log_values (value) VALUES (?)", (key,))
+            value_id = self.conn.execute("SELECT id FROM log_values WHERE value = ?", (key,)).fetchone()[0]
+            self.value_ids[key] = value_id
+        return value_id
+
+    def _encode_row(self, row):
+        """Queued row -> vision_logs row with interned values and a compressed payload"""
+        timestamp, agent_type, data_type, confidence, data = row
+        refs = []  # Position i: log_values id for INTERNED_FIELDS[agent_type][i], or None
+        rest = data
+        if isinstance(data, dict):
+            rest = dict(data)
+            for field in INTERNED_FIELDS.get(agent_type, ()):
+                value = data.get(field)
+                if isinstance(value, str) or (isinstance(value, list) and all(isinstance(v, str) for v in value)):
+                    refs.append(self._intern(value))
+                    del rest[field]
                 else:
-                    content = str(data)[:200]
-                    data_type = "other"
-                    additional_info = ""
+                    refs.append(None)
+            while refs and refs[-1] is None:
+                refs.pop()
 
-                self.conn.execute('''
-                    INSERT INTO vision_logs
-                    (timestamp, agent_type, data_type, content, confidence, additional_info)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                ''', (
-                    msg.get("timestamp", time.time()),
-                    agent_type,
-                    data_type,
-                    content,
-                    data.get("confidence", 0),
-                    additional_info
-                ))
-                self.conn.commit()
-                print("[Logger] Message inserted into DB.")
-            except Exception as e:
-                print(f"[Logger Error] Database insert error: {str(e)}")
-                try:
-                    self.conn.close()
-                except Exception as close_error:
-                    print(f"[Logger Error] DB close failed: {str(close_error)}")
-                self.initialize_database()
-                print("[Logger] DB connection reinitialized.")
-            finally:
-                self.lock.release()
-        else:
+        packed = pack({"d": rest, "r": refs})
+        deflate = zlib.compressobj(9, zlib.DEFLATED, -15, zdict=PAYLOAD_ZDICT)
+        compressed = deflate.compress(packed) + deflate.flush()
+        payload = PAYLOAD_DEFLATE + compressed if len(compressed) < len(packed) else PAYLOAD_RAW + packed
+        return (timestamp, agent_type, data_type, confidence, refs[0] if refs else None, payload)
+
+    @staticmethod
+    def _unpack_payload(payload):
+        if payload[:1] == PAYLOAD_DEFLATE:
+            inflate = zlib.decompressobj(-15, zdict=PAYLOAD_ZDICT)
+            return unpack(inflate.decompress(payload[1:]) + inflate.flush())
+        return unpack(payload[1:])
+
+    _ROW_COLUMNS = "id, timestamp, agent_type, data_type, content, confidence, additional_info, content_id, payload"
+
+    def _decode_rows(self, conn, rows, values):
+        """vision_logs rows (_ROW_COLUMNS) -> dicts with the payload rebuilt as "data"
+
+        values caches log_values for the reading connection.
+        """
+        decoded = []
+        for row in rows:
+            (row_id, timestamp, agent_type, data_type, content, confidence,
+             additional_info, content_id, payload) = row
+            data = None
+            if payload is not None:
+                stored = self._unpack_payload(payload)
+                missing = [value_id for value_id in stored["r"] if value_id is not None and value_id not in values]
+                if missing:
+                    marks = ",".join("?" * len(missing))
+                    for value_id, value in conn.execute(
+                            f"SELECT id, value FROM log_values WHERE id IN ({marks})", missing):
+                        values[value_id] = json.loads(value)
+                data = stored["d"]
+                if stored["r"]:
+                    data = dict(data)
+                    for field, value_id in zip(INTERNED_FIELDS[agent_type], stored["r"]):
+                        if value_id is not None:
+                            data[field] = values[value_id]
+                content, additional_info = self.describe(agent_type, data)
+            decoded.append({
+                "id": row_id,
+                "timestamp": timestamp,
+                "agent_type": agent_type,
+                "data_type": data_type,
+                "content": content,
+                "confidence": confidence,
+                "additional_info": additional_info,
+                "data": data,
+            })
+        return decoded
+
+    def _enqueue(self, table, rows):
+        """Hand rows to the writer thread, or write them now without write-behind"""
+        if not self.write_behind:
+            self._write_rows({table: rows})
+            return
+        for row in rows:
+            try:
+                self.queue.put_nowait((table, row))
+            except queue.Full:
+                self.rows_dropped += 1
+                if self.rows_dropped % 1000 == 1:
+                    print(f"[Logger Warning] Write queue full, {self.rows_dropped} rows dropped so far.")
+
+    def _write_rows(self, rows_by_table):
+        """Write rows in one transaction; reconnects once on failure"""
+        if not self.lock.acquire(timeout=2):
             print("[Logger Error] Lock acquisition failed (possible deadlock).")
+            return
+        failed = False
+        try:
+            if self.conn is None:
+                return
+            with self.conn:  # One transaction, one commit
+                for table, rows in rows_by_table.items():
+                    if table == "vision_logs":
+                        self.conn.executemany(self._INSERT_SQL[table], [self._encode_row(row) for row in rows])
+                        if self.search_enabled:
+                            self._index_rows(rows)
+                    else:
+                        self.conn.executemany(self._INSERT_SQL[table], rows)
+                if "vision_logs" in rows_by_table:
+                    self.conn.executemany(self._COUNT_SQL, self._minute_counts(rows_by_table["vision_logs"]))
+            self.rows_written += sum(len(rows) for rows in rows_by_table.values())
+            self.batches += 1
+        except Exception as e:
+            print(f"[Logger Error] Database insert error: {str(e)}")
+            failed = True
+            self.value_ids.clear()  # Ids interned in the rolled-back batch are gone
+            try:
+                self.conn.close()
+            except Exception as close_error:
+                print(f"[Logger Error] DB close failed: {str(close_error)}")
+        finally:
+            self.lock.release()
+        if failed:
+            self.initialize_database()
+            print("[Logger] DB connection reinitialized.")
+
+    def _index_rows(self, rows):
+        """Add just-inserted vision_logs rows to log_search (inside the insert transaction)
+
+        The write transaction keeps other writers out, so the batch got
+        consecutive ids ending at last_insert_rowid().
+        """
+        last_id = self.conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+        first_id = last_id - len(rows) + 1
+        entries = []
+        for offset, (_, agent_type, _, _, data) in enumerate(rows):
+            text = self.search_text(agent_type, data)
+            if text:
+                entries.append((first_id + offset, text))
+        if entries:
+            self.conn.executemany("INSERT INTO log_search (rowid, text) VALUES (?, ?)", entries)
+
+    @staticmethod
+    def _minute_counts(rows):
+        counts = {}
+        for row in rows:
+            key = (int(row[0] // 60), row[1], row[2])
+            counts[key] = counts.get(key, 0) + 1
+        return [(*key, count) for key, count in counts.items()]
+
+    def _write_loop(self):
+        stop = False
+        while not stop:
+            if self.retention_days is not None and time.time() >= self.next_maintenance:
+                self.next_maintenance = time.time() + self.maintenance_interval
+                try:
+                    if self._claim_maintenance():
+                        self.run_maintenance()
+                except Exception as e:
+                    print(f"[Logger Error] Maintenance failed: {str(e)}")
+            try:
+                item = self.queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            batch = [item]
+            deadline = time.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            rows_by_table = {}
+            for entry in batch:
+                if entry is None:  # Close sentinel
+                    stop = True
+                    continue
+                table, row = entry
+                rows_by_table.setdefault(table, []).append(row)
+            if rows_by_table:
+                self._write_rows(rows_by_table)
+            for _ in batch:
+                self.queue.task_done()
+
+    def insert_message(self, msg):
+        """Log a generic MCP message"""
+        if not msg or "data" not in msg:
+            print("[Logger Warning] Skipping empty or invalid message.")
+            return
+        self._enqueue("vision_logs", [self._message_row(msg)])
 
     def log_error(self, error_msg):
         """Log system errors to database"""
-        if self.lock.acquire(timeout=2):
-            try:
+        self._enqueue("vision_logs", [(time.time(), "system", "error", None, {"error": str(error_msg)})])
+        print(f"[Logger] Error logged: {error_msg}")
+
+    def insert_metrics(self, snapshot, timestamp=None):
+        """Store one metrics snapshot ({name: values} from core.metrics)"""
+        timestamp = time.time() if timestamp is None else timestamp
+        rows = [
+            (timestamp, name, values["kind"], values.get("count"),
+             values.get("value", values.get("sum")), values.get("p50"), values.get("p95"))
+            for name, values in snapshot.items()
+        ]
+        if rows and self.conn is not None:
+            self._enqueue("metrics", rows)
+
+    def flush(self, timeout=5.0):
+        """Wait until every queued row is committed (up to timeout seconds)"""
+        deadline = time.time() + timeout
+        while self.queue.unfinished_tasks and time.time() < deadline:
+            time.sleep(0.01)
+
+    def _claim_maintenance(self):
+        """Take this interval's maintenance run; False if another logger has it"""
+        now = time.time()
+        with self.lock:
+            if self.conn is None:
+                return False
+            with self.conn:  # A single UPDATE, so only one connection can win
+                claimed = self.conn.execute("UPDATE log_maintenance SET next_run = ? "
+                                            "WHERE id = 1 AND next_run <= ?",
+                                            (now + self.maintenance_interval, now)).rowcount
+            if not claimed:
+                next_run = self.conn.execute("SELECT next_run FROM log_maintenance").fetchone()[0]
+                self.next_maintenance = max(self.next_maintenance, next_run)
+            return claimed == 1
+
+    def run_maintenance(self, now=None):
+        """Expire old day partitions, roll up old minute counts and reclaim space
+
+        Calling this directly skips the claim the writer takes; don't run it
+        while another logger on the same database may be doing maintenance.
+        """
+        now = time.time() if now is None else now
+        today = int(now // 86400)
+
+        if self.retention_days is not None:
+            cutoff = (today - self.retention_days) * 86400
+            while True:
+                with self.lock:
+                    if self.conn is None:
+                        return
+                    oldest = self.conn.execute("SELECT MIN(timestamp) FROM vision_logs WHERE timestamp < ?",
+                                               (cutoff,)).fetchone()[0]
+                if oldest is None:
+                    break
+                day_start = int(oldest // 86400) * 86400
+                self._expire_day(day_start, min(day_start + 86400, cutoff))
+
+        if self.rollup_days is not None:
+            self._rollup_minute_counts((today - self.rollup_days) * 1440)
+
+        with self.lock:
+            if self.conn is None:
+                return
+            self.conn.execute("PRAGMA incremental_vacuum")  # No-op until enable_incremental_vacuum()
+            self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def enable_incremental_vacuum(self):
+        """Switch a database created before incremental vacuum over (one full VACUUM)
+
+        The VACUUM rewrites the whole file and blocks every writer meanwhile,
+        so run it offline, e.g. python -m core.mcp_logger vacuum.
+        """
+        with self.lock:
+            if self.conn is None or self.conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+                return False
+            self.conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            self.conn.execute("VACUUM")
+            print("[Logger] Database switched to incremental vacuum")
+            return True
+
+    def _expire_day(self, start, end):
+        """Archive, summarise and delete raw rows in [start, end) (one UTC day at most)"""
+        os.makedirs(self.archive_dir, exist_ok=True)
+        day = datetime.fromtimestamp(start, timezone.utc).strftime("%Y-%m-%d")
+        path = os.path.join(self.archive_dir, f"vision_logs-{day}.jsonl.gz")
+        # Built aside and moved into place only once the delete has committed, so a
+        # crash in between leaves the old archive and the rows, not both copies
+        partial = path + ".partial"
+        if os.path.exists(path):
+            shutil.copyfile(path, partial)  # Late rows for an archived day are appended
+        elif os.path.exists(partial):
+            os.remove(partial)  # Left by a run that never committed
+
+        with self.lock:
+            if self.conn is None:
+                return
+            cursor = self.conn.execute(f"SELECT {self._ROW_COLUMNS} FROM vision_logs "
+                                       "WHERE timestamp >= ? AND timestamp < ? ORDER BY timestamp", (start, end))
+            values = {}
+            summary = {}
+            expired = 0
+            with gzip.open(partial, "at", encoding="utf-8") as archive:  # Appends a gzip member
+                while True:
+                    rows = cursor.fetchmany(1000)
+                    if not rows:
+                        break
+                    for row in self._decode_rows(self.conn, rows, values):
+                        archive.write(to_json(row) + "\n")
+                        key = (int(row["timestamp"] // 86400), row["agent_type"], row["data_type"],
+                               row["content"] or "")
+                        count, confidence_sum = summary.get(key, (0, 0.0))
+                        summary[key] = (count + 1, confidence_sum + (row["confidence"] or 0))
+                    expired += len(rows)
+
+            with self.conn:  # Summary and delete commit together
+                self.conn.executemany('''
+                    INSERT INTO log_summary_day (day, agent_type, data_type, content, count, confidence_sum)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (day, agent_type, data_type, content) DO UPDATE SET
+                        count = count + excluded.count,
+                        confidence_sum = confidence_sum + excluded.confidence_sum
+                ''', [(*key, count, confidence_sum) for key, (count, confidence_sum) in summary.items()])
+                if self.search_enabled:
+                    self.conn.execute("DELETE FROM log_search WHERE rowid IN "
+                                      "(SELECT id FROM vision_logs WHERE timestamp >= ? AND timestamp < ?)",
+                                      (start, end))
+                self.conn.execute("DELETE FROM vision_logs WHERE timestamp >= ? AND timestamp < ?", (start, end))
+            os.replace(partial, path)
+            self.rows_expired += expired
+        print(f"[Logger] Archived {expired} rows from {day} to {path}")
+
+    def _rollup_minute_counts(self, before_minute):
+        """Merge per-minute counts older than before_minute into one row per day"""
+        with self.lock:
+            if self.conn is None:
+                return
+            with self.conn:
                 self.conn.execute('''
-                    INSERT INTO vision_logs
-                    (timestamp, agent_type, data_type, content)
-                    VALUES (?, ?, ?, ?)
-                ''', (
-                    time.time(),
-                    "system",
-                    "error",
-                    str(error_msg)[:500]
-                ))
-                self.conn.commit()
-                print(f"[Logger] Error logged: {error_msg}")
-            except Exception as e:
-                print(f"[Logger Error] Error logging failed: {str(e)}")
-            finally:
-                self.lock.release()
-        else:
-            print("[Logger Error] Lock acquisition failed while logging error.")
+                    INSERT INTO log_counts_minute (minute, agent_type, data_type, count)
+                    SELECT (minute / 1440) * 1440, agent_type, data_type, SUM(count)
+                    FROM log_counts_minute WHERE minute < ? AND minute % 1440 != 0
+                    GROUP BY 1, 2, 3
+                    ON CONFLICT (minute, agent_type, data_type) DO UPDATE SET count = count + excluded.count
+                ''', (before_minute,))
+                self.conn.execute("DELETE FROM log_counts_minute WHERE minute < ? AND minute % 1440 != 0",
+                                  (before_minute,))
+
+    def _reader(self):
+        return sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False)
+
+    @staticmethod
+    def _where(agent_type=None, data_type=None, since=None, until=None, time_column="timestamp"):
+        clauses, params = [], []
+        if agent_type is not None:
+            clauses.append("agent_type = ?")
+            params.append(agent_type)
+        if data_type is not None:
+            clauses.append("data_type = ?")
+            params.append(data_type)
+        if since is not None:
+            clauses.append(f"{time_column} >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append(f"{time_column} < ?")
+            params.append(until)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def query(self, agent_type=None, data_type=None, since=None, until=None, limit=None,
+              newest_first=False, batch_size=500):
+        """Yield matching vision_logs rows as dicts, streamed from the cursor
+
+        since/until are epoch seconds (until is exclusive). Rows are fetched
+        batch_size at a time, so iterating months of logs keeps memory flat.
+        Each row carries the full payload as "data" (None for old rows).
+        """
+        where, params = self._where(agent_type, data_type, since, until)
+        sql = f"SELECT {self._ROW_COLUMNS} FROM vision_logs{where} ORDER BY timestamp {'DESC' if newest_first else 'ASC'}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+
+        conn = self._reader()
+        try:
+            cursor = conn.execute(sql, params)
+            values = {}
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from self._decode_rows(conn, rows, values)
+        finally:
+            conn.close()
+
+    def search(self, text, agent_type=None, since=None, until=None, limit=20, raw=False):
+        """Best matches for text in document text and product names, best first
+
+        Every word must match (English stemming, so "letters" finds "letter").
+        raw=True passes text through as an FTS5 query (OR, NEAR, "phrases",
+        prefix*). Each result is a query() row plus "rank" (BM25, lower is
+        better) and "snippet" with the matched words in [brackets]. Copies of
+        one message (same agent, timestamp and text, as older databases hold
+        for documents) are returned once.
+        """
+        if not self.search_enabled:
+            raise RuntimeError("Full-text search is not available in this SQLite build")
+        if not raw:
+            words = re.findall(r"\w+", text)
+            if not words:
+                return []
+            text = " ".join(f'"{word}"' for word in words)
+
+        clauses, params = ["log_search MATCH ?"], [text]
+        if agent_type is not None:
+            clauses.append("l.agent_type = ?")
+            params.append(agent_type)
+        if since is not None:
+            clauses.append("l.timestamp >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("l.timestamp < ?")
+            params.append(until)
+        names = [column.strip() for column in self._ROW_COLUMNS.split(",")]
+        columns = ", ".join(f"l.{name}" for name in names)
+        sql = (f"SELECT {columns}, bm25(log_search), snippet(log_search, 0, '[', ']', '...', 12) "
+               f"FROM log_search JOIN vision_logs l ON l.id = log_search.rowid "
+               f"WHERE {' AND '.join(clauses)} ORDER BY bm25(log_search)")
+        agent_index, time_index = names.index("agent_type"), names.index("timestamp")
+
+        conn = self._reader()
+        try:
+            cursor = conn.execute(sql, params)
+            rows, seen = [], set()
+            while len(rows) < limit:
+                batch = cursor.fetchmany(max(int(limit), 50))
+                if not batch:
+                    break
+                for row in batch:
+                    key = (row[agent_index], row[time_index], row[-1])
+                    if key not in seen and len(rows) < limit:
+                        seen.add(key)
+                        rows.append(row)
+            results = self._decode_rows(conn, [row[:-2] for row in rows], {})
+            for result, row in zip(results, rows):
+                result["rank"], result["snippet"] = row[-2], row[-1]
+            return results
+        finally:
+            conn.close()
+
+    def count(self, agent_type=None, data_type=None, since=None, until=None):
+        """Number of matching rows; whole minutes come from the per-minute counts
+
+        The counts outlive raw-row retention, so this includes rows that
+        maintenance has since archived and deleted (query() no longer returns
+        them). Counts older than rollup_days are per day, so ranges that cut
+        through such a day count it by its first minute.
+        """
+        conn = self._reader()
+        try:
+            first_minute = None if since is None else math.ceil(since / 60)
+            end_minute = None if until is None else math.floor(until / 60)
+            if first_minute is not None and end_minute is not None and first_minute >= end_minute:
+                where, params = self._where(agent_type, data_type, since, until)
+                return conn.execute(f"SELECT COUNT(*) FROM vision_logs{where}", params).fetchone()[0]
+
+            where, params = self._where(agent_type, data_type, first_minute, end_minute, "minute")
+            total = conn.execute(f"SELECT COALESCE(SUM(count), 0) FROM log_counts_minute{where}",
+                                 params).fetchone()[0]
+            # Partial minutes at either edge come from the raw rows
+            edges = []
+            if first_minute is not None:
+                edges.append((since, first_minute * 60))
+            if end_minute is not None:
+                edges.append((end_minute * 60, until))
+            for start, end in edges:
+                where, params = self._where(agent_type, data_type, start, end)
+                total += conn.execute(f"SELECT COUNT(*) FROM vision_logs{where}", params).fetchone()[0]
+            return total
+        finally:
+            conn.close()
+
+    def counts_per_minute(self, agent_type=None, data_type=None, since=None, until=None):
+        """[(minute start epoch seconds, count)] from the per-minute counts"""
+        where, params = self._where(agent_type, data_type,
+                                    None if since is None else int(since // 60),
+                                    None if until is None else math.ceil(until / 60), "minute")
+        conn = self._reader()
+        try:
+            rows = conn.execute(f"SELECT minute, SUM(count) FROM log_counts_minute{where} "
+                                f"GROUP BY minute ORDER BY minute", params).fetchall()
+            return [(minute * 60, count) for minute, count in rows]
+        finally:
+            conn.close()
+
+    def stats(self):
+        return {
+            "queued": self.queue.qsize(),
+            "rows_written": self.rows_written,
+            "rows_dropped": self.rows_dropped,
+            "batches": self.batches,
+            "rows_expired": self.rows_expired,
+        }
 
     def close_connection(self):
-        """Safely close database connection"""
+        """Flush pending rows, then safely close the database connection"""
+        if self.writer is not None and self.writer.is_alive():
+            self.queue.put(None)  # Writer commits what is queued before the sentinel, then exits
+            self.writer.join(10)
         with self.lock:
             try:
                 if self.conn:
                     self.conn.close()
+                    self.conn = None
                     print("[Logger] Database connection closed.")
             except Exception as e:
                 print(f"[Logger Error] Error closing database: {str(e)}")
 
     close = close_connection  # Alias for backward compatibility
+
+
+if __name__ == "__main__":
+    import sys
+
+    if sys.argv[1:2] == ["vacuum"]:
+        logger = MCPLogger(*sys.argv[2:3], write_behind=False)
+        logger.enable_incremental_vacuum()
+        logger.close()
+    else:
+        print("usage: python -m core.mcp_logger vacuum [db_path]")
@@ -0,0 +1,199 @@
+"""Versioned binary MCP envelope with per-agent topics
+
+Every MCP message is a three-frame ZeroMQ multipart message:
+
+    topic    b"mcp/<agent>/" so SUB sockets filter by agent in ZeroMQ itself
+    header   protocol version and codec (struct "<BB")
+    body     {"source", "agent", "data", "timestamp"[, "trace"]} encoded with the codec
+
+The body is msgpack when it is installed, JSON otherwise (or when
+VISIONAID_MCP_CODEC=json). Receivers decode both, and still accept legacy
+single-frame send_json() messages. numpy arrays in the payload (bounding
+boxes, scores) travel as raw bytes under msgpack and as nested lists under
+JSON, and come back as numpy arrays either way.
+"""
+import json
+import os
+import struct
+import time
+from collections import namedtuple
+
+import numpy as np
+import zmq
+
+try:
+    import msgpack  # Optional: compact binary codec
+except ImportError:
+    msgpack = None
+
+
+MCP_VERSION = 1
+CODEC_JSON = 0
+CODEC_MSGPACK = 1
+HEADER = struct.Struct("<BB")  # version, codec
+TOPIC_PREFIX = b"mcp/"
+LEGACY_PREFIX = b"{"  # First byte of every send_json() message
+
+DEFAULT_CODEC = (CODEC_MSGPACK if msgpack is not None and os.environ.get("VISIONAID_MCP_CODEC") != "json"
+                 else CODEC_JSON)
+
+ArraySpec = namedtuple("ArraySpec", ["dtype", "columns"])  # columns=None for 1-D arrays
+
+# agent -> field -> (accepted types, required)
+PAYLOAD_SCHEMAS = {
+    "object": {
+        "objects": (list, True),
+        "count": (int, True),
+        "labels": (list, False),
+        "boxes": (ArraySpec("float32", 4), False),  # x1, y1, x2, y2 in pixels
+        "scores": (ArraySpec("float32", None), False),
+    },
+    "barcode": {
+        "code": (str, True),
+        "product": ((str, type(None)), False),
+        "brand": ((str, type(None)), False),
+    },
+    "document": {
+        "text": (str, True),
+        "char_count": (int, False),
+    },
+    "emotion": {
+        "top_emotion": (str, True),
+        "confidence": ((float, int), True),
+    },
+    "heartbeat": {
+        "worker": (str, True),
+        "pid": (int, True),
+        "state": (str, False),
+    },
+}
+
+
+def topic_for(agent):
+    """Subscription/topic frame for one agent's messages"""
+    return TOPIC_PREFIX + agent.encode("utf-8") + b"/"
+
+
+def validate_payload(agent, data):
+    """Raise ValueError if data does not match the agent's schema (unknown agents pass)"""
+    schema = PAYLOAD_SCHEMAS.get(agent)
+    if schema is None:
+        return
+    if not isinstance(data, dict):
+        raise ValueError(f"{agent} payload must be a dict")
+    for field, (expected, required) in schema.items():
+        if field not in data:
+            if required:
+                raise ValueError(f"{agent} payload is missing '{field}'")
+            continue
+        value = data[field]
+        if isinstance(expected, ArraySpec):
+            if not isinstance(value, np.ndarray) or value.dtype != np.dtype(expected.dtype):
+                raise ValueError(f"{agent}.{field} must be a {expected.dtype} numpy array")
+            if expected.columns is None and value.ndim != 1:
+                raise ValueError(f"{agent}.{field} must be 1-D")
+            if expected.columns is not None and (value.ndim != 2 or value.shape[1] != expected.columns):
+                raise ValueError(f"{agent}.{field} must have shape (n, {expected.columns})")
+        elif not isinstance(value, expected):
+            raise ValueError(f"{agent}.{field} has unexpected type {type(value).__name__}")
+
+
+def _pack_default(raw):
+    def default(value):
+        if isinstance(value, np.ndarray):
+            data = value.tobytes() if raw else value.tolist()
+            return {"__nd__": [value.dtype.str, list(value.shape), data]}
+        if isinstance(value, np.generic):
+            return value.item()
+        if isinstance(value, (set, tuple)):
+            return list(value)
+        raise TypeError(f"Cannot encode {type(value).__name__}")
+    return default
+
+
+def _unpack_hook(raw):
+    def hook(obj):
+        if "__nd__" in obj and len(obj) == 1:
+            dtype, shape, data = obj["__nd__"]
+            if raw:
+                return np.frombuffer(data, dtype=dtype).reshape(shape)
+            return np.asarray(data, dtype=dtype).reshape(shape)
+        return obj
+    return hook
+
+
+def encode(agent, data, source="vision", timestamp=None, codec=None, trace=None):
+    """Build the multipart frames for one message"""
+    codec = DEFAULT_CODEC if codec is None else codec
+    message = {
+        "source": source,
+        "agent": agent,
+        "data": data,
+        "timestamp": time.time() if timestamp is None else timestamp,
+    }
+    if trace is not None:
+        message["trace"] = trace  # See core.tracing
+    packed = pack(message, codec)
+    return [topic_for(agent), packed[:HEADER.size], packed[HEADER.size:]]
+
+
+def decode(frames):
+    """Turn received frames (envelope or legacy JSON) back into a message dict"""
+    if len(frames) == 1:
+        return json.loads(frames[0])  # Legacy send_json()
+    if len(frames) != 3:
+        raise ValueError(f"Malformed MCP message ({len(frames)} frames)")
+
+    version, codec = HEADER.unpack(frames[1])
+    if version > MCP_VERSION:
+        raise ValueError(f"Unsupported MCP version {version}")
+    if codec == CODEC_MSGPACK:
+        if msgpack is None:
+            raise ValueError("Received a msgpack message but msgpack is not installed")
+        return msgpack.unpackb(frames[2], object_hook=_unpack_hook(True), raw=False)
+    if codec == CODEC_JSON:
+        return json.loads(frames[2], object_hook=_unpack_hook(False))
+    raise ValueError(f"Unknown MCP codec {codec}")
+
+
+def pack(value, codec=None):
+    """Header + body bytes for any payload value, for storage rather than the bus"""
+    codec = DEFAULT_CODEC if codec is None else codec
+    if codec == CODEC_MSGPACK:
+        if msgpack is None:
+            raise ValueError("msgpack is not installed")
+        body = msgpack.packb(value, default=_pack_default(True), use_bin_type=True)
+    else:
+        body = json.dumps(value, default=_pack_default(False), separators=(",", ":")).encode("utf-8")
+    return HEADER.pack(MCP_VERSION, codec) + body
+
+
+def unpack(blob):
+    """Inverse of pack()"""
+    return decode([b"", blob[:HEADER.size], blob[HEADER.size:]])
+
+
+def to_json(value):
+    """JSON text for a payload value; numpy arrays keep their dtype and shape"""
+    return json.dumps(value, default=_pack_default(False), separators=(",", ":"))
+
+
+def publish(socket, agent, data, source="vision", timestamp=None, flags=0, validate=True, trace=None):
+    """Validate and send one message on a PUB socket"""
+    if validate:
+        validate_payload(agent, data)
+    socket.send_multipart(encode(agent, data, source, timestamp, trace=trace), flags)
+
+
+def receive(socket, flags=0):
+    """Receive and decode one message from a SUB socket"""
+    return decode(socket.recv_multipart(flags))
+
+
+def subscribe(socket, agents=None, legacy=True):
+    """Subscribe to some agents' topics (all when None), plus legacy JSON senders"""
+    prefixes = [TOPIC_PREFIX] if agents is None else [topic_for(agent) for agent in agents]
+    if legacy:
+        prefixes.append(LEGACY_PREFIX)
+    for prefix in prefixes:
+        socket.setsockopt(zmq.SUBSCRIBE, prefix)
@@ -0,0 +1,74 @@
+"""Process-wide ZeroMQ transport for MCP traffic
+
+One zmq context per process and one cached socket per (type, endpoint,
+bind), so agents that are stopped and started again reuse their sockets
+instead of paying for a new context each time. Every socket gets bounded
+queues, no linger on close and a send timeout, so a missing or slow peer
+can never stall a frame loop. Nothing is created until a socket is asked
+for.
+
+A cached socket must only be used from one thread at a time (ZeroMQ
+sockets are not thread-safe); MCPPublisher funnels all sends through its
+sender thread for this reason. Other threads that need to send take their
+own socket from new_socket().
+"""
+import threading
+
+import zmq
+
+
+SNDHWM = 100  # Messages queued per peer before PUB drops new ones
+RCVHWM = 1000
+LINGER_MS = 0  # Don't hold shutdown for undelivered messages
+SNDTIMEO_MS = 100  # Upper bound for blocking sends on non-PUB sockets
+
+_lock = threading.Lock()
+_sockets = {}
+
+
+def get_context():
+    return zmq.Context.instance()
+
+
+def new_socket(socket_type, endpoint, bind=False):
+    """A configured socket that is not cached; the caller owns and closes it"""
+    socket = get_context().socket(socket_type)
+    socket.setsockopt(zmq.LINGER, LINGER_MS)
+    socket.setsockopt(zmq.SNDHWM, SNDHWM)
+    socket.setsockopt(zmq.RCVHWM, RCVHWM)
+    socket.setsockopt(zmq.SNDTIMEO, SNDTIMEO_MS)
+    if bind:
+        socket.bind(endpoint)
+    else:
+        socket.connect(endpoint)
+    return socket
+
+
+def get_socket(socket_type, endpoint, bind=False):
+    """Return the shared socket for (type, endpoint, bind), creating it once"""
+    key = (socket_type, endpoint, bind)
+    with _lock:
+        socket = _sockets.get(key)
+        if socket is not None and not socket.closed:
+            return socket
+
+        socket = new_socket(socket_type, endpoint, bind)
+        _sockets[key] = socket
+        return socket
+
+
+def close_socket(socket_type, endpoint, bind=False):
+    """Close one cached socket (the next get_socket() creates a fresh one)"""
+    with _lock:
+        socket = _sockets.pop((socket_type, endpoint, bind), None)
+    if socket is not None:
+        socket.close()
+
+
+def close_all():
+    """Close every cached socket; for process shutdown"""
+    with _lock:
+        sockets = list(_sockets.values())
+        _sockets.clear()
+    for socket in sockets:
+        socket.close()
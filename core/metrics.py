@@ -0,0 +1,204 @@
+"""Lightweight in-process metrics: counters, gauges and fixed-bucket histograms
+
+Stages record into the shared `metrics` registry:
+
+    metrics.counter("object.frames").inc()
+    with metrics.timer("object.inference_seconds"):
+        results = model(frame)
+
+Histograms keep fixed bucket counts (no samples), so recording is O(buckets)
+and memory stays constant; p50/p95 are interpolated within buckets. Read
+the numbers with snapshot(), over HTTP with serve() (plain text, one line
+per value, at http://127.0.0.1:9109/metrics), or have start_snapshots()
+write them to the SQLite log periodically.
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# Seconds; covers a ~1 ms barcode decode up to a multi-second OCR or TTS call
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.15, 0.25,
+                   0.5, 0.75, 1.0, 2.5, 5.0, 10.0)
+DEFAULT_METRICS_PORT = 9109
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self):
+        self.value = 0
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self.lock:
+            self.value += amount
+
+    def snapshot(self):
+        return {"value": self.value}
+
+
+class Gauge:
+    kind = "gauge"
+
+    def __init__(self):
+        self.value = 0.0
+
+    def set(self, value):
+        self.value = value
+
+    def snapshot(self):
+        return {"value": self.value}
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.bounds = tuple(buckets)
+        self.counts = [0] * (len(self.bounds) + 1)  # Last bucket: above the highest bound
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.bounds, value)
+        with self.lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.total += value
+            if value > self.max:
+                self.max = value
+
+    def percentile(self, pct):
+        """Estimate a percentile by interpolating inside the bucket that holds it"""
+        with self.lock:
+            counts = list(self.counts)
+            count = self.count
+            top = self.max
+        if not count:
+            return 0.0
+        rank = pct / 100 * count
+        seen = 0
+        for index, bucket_count in enumerate(counts):
+            if seen + bucket_count >= rank and bucket_count:
+                lower = self.bounds[index - 1] if index > 0 else 0.0
+                upper = self.bounds[index] if index < len(self.bounds) else top
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return top
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "sum": self.total,
+            "max": self.max,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+        }
+
+
+class MetricsRegistry:
+    """Named metrics, created on first use"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.metrics = {}
+        self.server = None
+        self.snapshot_thread = None
+        self.snapshot_stop = threading.Event()
+
+    def _get(self, name, factory):
+        metric = self.metrics.get(name)
+        if metric is None:
+            with self.lock:
+                metric = self.metrics.setdefault(name, factory())
+        return metric
+
+    def counter(self, name):
+        return self._get(name, Counter)
+
+    def gauge(self, name):
+        return self._get(name, Gauge)
+
+    def histogram(self, name, buckets=LATENCY_BUCKETS):
+        return self._get(name, lambda: Histogram(buckets))
+
+    @contextmanager
+    def timer(self, name):
+        """Observe the duration of the block in the named histogram"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.histogram(name).observe(time.perf_counter() - started)
+
+    def snapshot(self):
+        """{name: {"kind": ..., values...}} for every metric"""
+        with self.lock:
+            items = sorted(self.metrics.items())
+        return {name: {"kind": metric.kind, **metric.snapshot()} for name, metric in items}
+
+    def render_text(self):
+        """One "name field value" line per value, for the HTTP endpoint"""
+        lines = []
+        for name, values in self.snapshot().items():
+            for field, value in values.items():
+                if field != "kind":
+                    lines.append(f"{name} {field} {value:.6g}" if isinstance(value, float)
+                                 else f"{name} {field} {value}")
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port=DEFAULT_METRICS_PORT, host="127.0.0.1"):
+        """Serve render_text() at http://host:port/metrics from a daemon thread"""
+        if self.server is not None:
+            return self.server
+        registry = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = registry.render_text().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Keep scrapes out of the console
+
+        self.server = ThreadingHTTPServer((host, port), _Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True, name="MetricsHTTP").start()
+        print(f"[Metrics] Serving on http://{host}:{port}/metrics")
+        return self.server
+
+    def start_snapshots(self, logger, interval=60.0):
+        """Write a snapshot to the logger's metrics table every interval seconds"""
+        if self.snapshot_thread is not None:
+            return
+
+        def _loop():
+            while not self.snapshot_stop.wait(interval):
+                try:
+                    logger.insert_metrics(self.snapshot())
+                except Exception as e:
+                    print(f"[Metrics] Snapshot failed: {e}")
+
+        self.snapshot_thread = threading.Thread(target=_loop, daemon=True, name="MetricsSnapshot")
+        self.snapshot_thread.start()
+
+    def shutdown(self):
+        self.snapshot_stop.set()
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+
+metrics = MetricsRegistry()
@@ -0,0 +1,155 @@
+import gc
+import os
+import threading
+import time
+
+
+try:
+    import psutil  # Optional: only used for models that aren't torch modules
+except ImportError:
+    psutil = None
+
+
+def _rss():
+    return psutil.Process().memory_info().rss if psutil else 0
+
+
+def estimate_size(model):
+    """Approximate memory held by a model, in bytes"""
+    module = model
+    if not hasattr(module, "parameters") and hasattr(module, "model"):
+        module = module.model  # HuggingFace pipelines wrap the torch module
+    if hasattr(module, "parameters"):
+        try:
+            size = sum(p.numel() * p.element_size() for p in module.parameters())
+            if hasattr(module, "buffers"):
+                size += sum(b.numel() * b.element_size() for b in module.buffers())
+            return size
+        except Exception:
+            pass
+    return 0
+
+
+class ModelRegistry:
+    """Loads each model once per process and evicts idle ones under a RAM budget
+
+    Callers fetch models through get() every time they need one instead of
+    keeping their own reference, so an evicted model is simply reloaded on
+    the next call.
+    """
+
+    def __init__(self, budget_bytes=None, min_idle_seconds=10.0):
+        self.budget_bytes = budget_bytes  # None = never evict
+        self.min_idle_seconds = min_idle_seconds  # Recently used models are never evicted
+        self.lock = threading.Lock()
+        self.loaders = {}
+        self.load_locks = {}
+        self.models = {}  # name -> {"model", "size", "last_used", "loaded_at"}
+
+        # Counters
+        self.loads = 0
+        self.hits = 0
+        self.evictions = 0
+
+    def register(self, name, loader, size_hint=None):
+        """Declare how to load a model without loading it"""
+        with self.lock:
+            self.loaders.setdefault(name, (loader, size_hint))
+            self.load_locks.setdefault(name, threading.Lock())
+
+    def get(self, name, loader=None, size_hint=None):
+        """Return the shared instance of a model, loading it if needed"""
+        if loader is not None:
+            self.register(name, loader, size_hint)
+
+        with self.lock:
+            entry = self.models.get(name)
+            if entry is not None:
+                entry["last_used"] = time.time()
+                self.hits += 1
+                return entry["model"]
+            if name not in self.loaders:
+                raise KeyError(f"Unknown model '{name}'")
+            load_lock = self.load_locks[name]
+
+        # Load outside the registry lock so other models stay available
+        with load_lock:
+            with self.lock:
+                entry = self.models.get(name)
+                if entry is not None:
+                    entry["last_used"] = time.time()
+                    return entry["model"]
+                loader, size_hint = self.loaders[name]
+
+            started = time.time()
+            rss_before = _rss()
+            model = loader()
+            size = estimate_size(model) or max(0, _rss() - rss_before) or (size_hint or 0)
+            print(f"[ModelRegistry] Loaded {name} in {time.time() - started:.1f}s "
+                  f"(~{size / 2 ** 20:.0f} MB)")
+
+            with self.lock:
+                now = time.time()
+                self.models[name] = {"model": model, "size": size, "last_used": now, "loaded_at": now}
+                self.loads += 1
+                self._enforce_budget(keep=name)
+            return model
+
+    def total_bytes(self):
+        with self.lock:
+            return sum(entry["size"] for entry in self.models.values())
+
+    def _enforce_budget(self, keep=None):
+        """Evict least recently used idle models until under budget (lock held)"""
+        if self.budget_bytes is None:
+            return
+        total = sum(entry["size"] for entry in self.models.values())
+        now = time.time()
+        candidates = sorted(
+            (entry["last_used"], name) for name, entry in self.models.items()
+            if name != keep and now - entry["last_used"] >= self.min_idle_seconds
+        )
+        for _, name in candidates:
+            if total <= self.budget_bytes:
+                break
+            total -= self.models[name]["size"]
+            self._drop(name)
+        if total > self.budget_bytes:
+            print(f"[ModelRegistry] Over budget: {total / 2 ** 20:.0f} MB in use, "
+                  f"budget {self.budget_bytes / 2 ** 20:.0f} MB")
+
+    def _drop(self, name):
+        del self.models[name]
+        self.evictions += 1
+        gc.collect()
+        try:
+            import torch
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+        except ImportError:
+            pass
+        print(f"[ModelRegistry] Evicted {name}")
+
+    def evict(self, name):
+        """Drop a model now; it reloads on the next get()"""
+        with self.lock:
+            if name in self.models:
+                self._drop(name)
+
+    def stats(self):
+        with self.lock:
+            now = time.time()
+            return {
+                "budget_bytes": self.budget_bytes,
+                "loads": self.loads,
+                "hits": self.hits,
+                "evictions": self.evictions,
+                "models": {
+                    name: {"size": entry["size"], "idle_seconds": now - entry["last_used"]}
+                    for name, entry in self.models.items()
+                },
+            }
+
+
+_budget_mb = os.environ.get("VISIONAID_MODEL_BUDGET_MB")
+model_registry = ModelRegistry(budget_bytes=int(_budget_mb) * 2 ** 20 if _budget_mb else None)
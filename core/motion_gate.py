@@ -0,0 +1,68 @@
+import time
+
+import cv2
+import numpy as np
+
+
+class MotionGate:
+    """Cheap change detector that lets agents skip inference on static scenes
+
+    Each frame is shrunk to a tiny blurred grayscale image and compared with
+    the last frame that was let through. Comparing against that reference
+    (not the previous frame) means slow drift still adds up to a change.
+    """
+
+    def __init__(self, size=(64, 48), pixel_threshold=25, changed_fraction=0.01, max_skip_seconds=2.0):
+        self.size = size  # (width, height) of the comparison image
+        self.pixel_threshold = pixel_threshold  # Per-pixel intensity change that counts
+        self.changed_fraction = changed_fraction  # Share of changed pixels that means "motion"
+        self.max_skip_seconds = max_skip_seconds  # Force a refresh at least this often
+
+        self.reference = None
+        self.last_pass = 0.0
+        self.last_fraction = 0.0
+
+        # Counters
+        self.frames_seen = 0
+        self.frames_passed = 0
+        self.frames_skipped = 0
+
+    def _signature(self, frame):
+        gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        small = cv2.resize(gray, self.size, interpolation=cv2.INTER_AREA)
+        return cv2.GaussianBlur(small, (3, 3), 0)
+
+    def changed(self, frame, now=None):
+        """True if the frame differs enough from the last processed one"""
+        now = time.time() if now is None else now
+        self.frames_seen += 1
+        signature = self._signature(frame)
+
+        if self.reference is None or self.reference.shape != signature.shape:
+            changed = True
+            self.last_fraction = 1.0
+        else:
+            diff = cv2.absdiff(signature, self.reference)
+            self.last_fraction = np.count_nonzero(diff > self.pixel_threshold) / diff.size
+            changed = bool(self.last_fraction >= self.changed_fraction or
+                           now - self.last_pass >= self.max_skip_seconds)
+
+        if changed:
+            self.reference = signature
+            self.last_pass = now
+            self.frames_passed += 1
+        else:
+            self.frames_skipped += 1
+        return changed
+
+    def reset(self):
+        """Forget the reference so the next frame is always processed"""
+        self.reference = None
+
+    def stats(self):
+        return {
+            "frames_seen": self.frames_seen,
+            "frames_passed": self.frames_passed,
+            "frames_skipped": self.frames_skipped,
+            "skip_rate": self.frames_skipped / self.frames_seen if self.frames_seen else 0.0,
+        }
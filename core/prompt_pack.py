@@ -0,0 +1,205 @@
+"""Ahead-of-time prompt pack for fixed system phrases
+
+Build once (needs network for synthesis, or a warm audio cache):
+
+    python -m core.prompt_pack build
+    python -m core.prompt_pack list
+
+The pack is a single file: a small header, a JSON index, then the MP3 clips
+back to back. It is loaded into memory at startup so speak() can play these
+phrases without any synthesis, fully offline.
+"""
+import argparse
+import ast
+import hashlib
+import json
+import os
+import struct
+import sys
+import time
+
+from core.audio_cache import AudioCache, DEFAULT_CACHE_DIR
+
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_PACK_PATH = os.path.join(PROJECT_ROOT, "memory", "prompt_pack.bin")
+
+PACK_MAGIC = b"VAPP"
+PACK_FORMAT = 1
+HEADER = struct.Struct("<4sHI")  # magic, format version, index length
+
+# Phrases built at runtime from fixed parts, which the source scan can't see.
+# Keep in sync with MasterAgent.switch_agent, VoiceControl.listen and
+# ProductCaptureAgent.get_product_name.
+AGENT_NAMES = [
+    "object_detection", "barcode_scanner", "document_reader",
+    "navigation", "ecommerce_agent", "emotion_detection_agent", "assist",
+]
+TEMPLATED_PHRASES = [
+    *[f"Switched to {name.replace('_', ' ')}" for name in AGENT_NAMES],
+    "Say a command: Object Detection, Barcode Scanner, Document Reader, Navigation, Search Online",
+    "What product are you looking for today?",
+]
+
+SKIP_DIRS = {"Test", "memory", "__pycache__", ".git", "venv", ".venv"}
+
+
+def extract_phrases(root=PROJECT_ROOT):
+    """Find every speak("literal") call in the source tree"""
+    phrases = set()
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS]
+        for filename in filenames:
+            if not filename.endswith(".py"):
+                continue
+            path = os.path.join(dirpath, filename)
+            try:
+                with open(path, encoding="utf-8") as f:
+                    tree = ast.parse(f.read(), filename=path)
+            except (SyntaxError, UnicodeDecodeError) as e:
+                print(f"[PromptPack] Skipping {path}: {e}")
+                continue
+
+            for node in ast.walk(tree):
+                if not isinstance(node, ast.Call) or not node.args:
+                    continue
+                func = node.func
+                name = func.id if isinstance(func, ast.Name) else getattr(func, "attr", None)
+                arg = node.args[0]
+                if name == "speak" and isinstance(arg, ast.Constant) and isinstance(arg.value, str):
+                    phrases.add(arg.value)
+
+    phrases.update(TEMPLATED_PHRASES)
+    return sorted(phrases)
+
+
+def pack_version(phrases, voice, lang, rate):
+    """Short hash identifying the phrase set and voice settings"""
+    raw = json.dumps([phrases, voice, lang, rate], ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:12]
+
+
+class PromptPack:
+    """In-memory lookup of pre-synthesized phrases"""
+
+    def __init__(self, index=None, blob=b""):
+        self.index = index or {"version": None, "phrases": {}}
+        self.blob = blob
+        self.hits = 0
+
+    @property
+    def version(self):
+        return self.index.get("version")
+
+    def __len__(self):
+        return len(self.index["phrases"])
+
+    @classmethod
+    def load(cls, path=DEFAULT_PACK_PATH):
+        """Load a pack file, returning an empty pack if it is missing or invalid"""
+        if not os.path.exists(path):
+            print(f"[PromptPack] No prompt pack at {path}; run 'python -m core.prompt_pack build'")
+            return cls()
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            magic, fmt, index_len = HEADER.unpack_from(data)
+            if magic != PACK_MAGIC or fmt != PACK_FORMAT:
+                raise ValueError(f"unsupported pack format {magic!r} v{fmt}")
+            start = HEADER.size
+            index = json.loads(data[start:start + index_len].decode("utf-8"))
+            pack = cls(index, data[start + index_len:])
+            print(f"[PromptPack] Loaded {len(pack)} phrases (version {pack.version})")
+            return pack
+        except Exception as e:
+            print(f"[PromptPack] Failed to load {path}: {e}")
+            return cls()
+
+    def get(self, text, voice="com", lang="en", rate="normal"):
+        """Return pre-synthesized audio bytes for a phrase, or None"""
+        entry = self.index["phrases"].get(AudioCache.make_key(text, voice, lang, rate))
+        if entry is None:
+            return None
+        offset, length = entry
+        self.hits += 1
+        return self.blob[offset:offset + length]
+
+    @staticmethod
+    def write(path, phrases, clips, voice, lang, rate):
+        """Write clips (text -> MP3 bytes) to a pack file"""
+        entries = {}
+        chunks = []
+        offset = 0
+        for text in phrases:
+            audio = clips.get(text)
+            if not audio:
+                continue
+            entries[AudioCache.make_key(text, voice, lang, rate)] = [offset, len(audio)]
+            chunks.append(audio)
+            offset += len(audio)
+
+        index = json.dumps({
+            "version": pack_version(phrases, voice, lang, rate),
+            "voice": voice,
+            "lang": lang,
+            "rate": rate,
+            "created": time.time(),
+            "phrases": entries,
+        }, separators=(",", ":")).encode("utf-8")
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(HEADER.pack(PACK_MAGIC, PACK_FORMAT, len(index)))
+            f.write(index)
+            for chunk in chunks:
+                f.write(chunk)
+        os.replace(tmp_path, path)
+        return len(entries)
+
+
+def build(path=DEFAULT_PACK_PATH, voice="com", lang="en", slow=False, cache_dir=DEFAULT_CACHE_DIR):
+    """Synthesize every static phrase (reusing the audio cache) and write the pack"""
+    from gtts import gTTS
+    import io
+
+    def synthesize(text):
+        buffer = io.BytesIO()
+        gTTS(text, lang=lang, tld=voice, slow=slow).write_to_fp(buffer)
+        return buffer.getvalue()
+
+    rate = "slow" if slow else "normal"
+    cache = AudioCache(cache_dir)
+    phrases = extract_phrases()
+    clips = {}
+    for text in phrases:
+        try:
+            clips[text] = cache.get_or_synthesize(text, lambda: synthesize(text),
+                                                  voice=voice, lang=lang, rate=rate)
+        except Exception as e:
+            print(f"[PromptPack] Could not synthesize '{text}': {e}")
+
+    count = PromptPack.write(path, phrases, clips, voice, lang, rate)
+    print(f"[PromptPack] Wrote {count}/{len(phrases)} phrases to {path} "
+          f"(version {pack_version(phrases, voice, lang, rate)})")
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the VisionAID prompt pack")
+    parser.add_argument("command", choices=["build", "list"])
+    parser.add_argument("--output", default=DEFAULT_PACK_PATH)
+    parser.add_argument("--voice", default="com", help="gTTS tld (accent)")
+    parser.add_argument("--lang", default="en")
+    parser.add_argument("--slow", action="store_true")
+    args = parser.parse_args(argv)
+
+    if args.command == "list":
+        for text in extract_phrases():
+            print(text)
+        return 0
+    return 0 if build(args.output, args.voice, args.lang, args.slow) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,190 @@
+import heapq
+import itertools
+import threading
+import time
+
+
+# Lower value = more urgent
+PRIORITY_URGENT = 0
+PRIORITY_HIGH = 1
+PRIORITY_NORMAL = 2
+PRIORITY_LOW = 3
+
+
+class Utterance:
+    """One queued piece of speech"""
+
+    def __init__(self, text, priority, kind, max_age, seq, options):
+        self.text = text
+        self.priority = priority
+        self.kind = kind  # Utterances of the same kind supersede each other
+        self.max_age = max_age  # Drop if still queued after this many seconds
+        self.seq = seq
+        self.options = options
+        self.enqueued_at = time.time()
+        self.status = "queued"  # queued | playing | done | dropped | preempted
+        self.done = threading.Event()
+        self.callbacks = []
+
+    def __lt__(self, other):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+    def finish(self, status):
+        self.status = status
+        self.done.set()
+        for callback in self.callbacks:
+            try:
+                callback(self)
+            except Exception as e:
+                print(f"[Speech] Done callback failed: {e}")
+
+    def add_done_callback(self, callback):
+        """Call callback(utterance) once it is spoken, dropped or preempted"""
+        self.callbacks.append(callback)
+        if self.done.is_set():
+            callback(self)
+
+    def wait(self, timeout=None):
+        return self.done.wait(timeout)
+
+
+class SpeechService:
+    """Background speech worker with a bounded priority queue"""
+
+    def __init__(self, play, stop, start=None, max_queue=8, preempt_priority=PRIORITY_URGENT):
+        self.play = play  # play(utterance) -> blocks until audio finishes
+        self.stop = stop  # stop() -> interrupts the current playback
+        self.start = start  # start() -> re-arms playback for a new utterance (called under the lock)
+        self.max_queue = max_queue
+        self.preempt_priority = preempt_priority  # This or more urgent may interrupt
+
+        self.queue = []
+        self.current = None
+        self.cond = threading.Condition()
+        self.counter = itertools.count()
+        self.running = False
+        self.worker = None
+
+        # Counters
+        self.spoken = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.preempted = 0
+
+    def _ensure_worker(self):
+        if self.worker is None or not self.worker.is_alive():
+            self.running = True
+            self.worker = threading.Thread(target=self._run, daemon=True, name="SpeechService")
+            self.worker.start()
+
+    def say(self, text, priority=PRIORITY_NORMAL, kind=None, max_age=None, **options):
+        """Queue text for speech and return its Utterance immediately"""
+        utterance = Utterance(text, priority, kind, max_age, next(self.counter), options)
+
+        with self.cond:
+            self._ensure_worker()
+
+            # Newer speech of the same kind replaces anything still waiting
+            if kind is not None:
+                stale = [u for u in self.queue if u.kind == kind]
+                if stale:
+                    self.queue = [u for u in self.queue if u.kind != kind]
+                    heapq.heapify(self.queue)
+                    for u in stale:
+                        u.finish("dropped")
+                    self.coalesced += len(stale)
+
+            if len(self.queue) >= self.max_queue:
+                worst = max(self.queue)
+                self.dropped += 1
+                if not utterance < worst:
+                    utterance.finish("dropped")
+                    return utterance
+                self.queue.remove(worst)
+                heapq.heapify(self.queue)
+                worst.finish("dropped")
+
+            heapq.heappush(self.queue, utterance)
+
+            # Urgent speech cuts off lower-priority chatter that is playing now
+            current = self.current
+            if (current is not None and
+                    priority <= self.preempt_priority and
+                    priority < current.priority):
+                current.status = "preempted"
+                self.preempted += 1
+                try:
+                    self.stop()
+                except Exception as e:
+                    print(f"[Speech] Preemption failed: {e}")
+            self.cond.notify()
+        return utterance
+
+    def _next(self):
+        """Pop the next utterance that is still fresh (cond held)"""
+        while self.queue:
+            utterance = heapq.heappop(self.queue)
+            if utterance.max_age is not None and time.time() - utterance.enqueued_at > utterance.max_age:
+                utterance.finish("dropped")
+                self.dropped += 1
+                continue
+            return utterance
+        return None
+
+    def _run(self):
+        while self.running:
+            with self.cond:
+                utterance = self._next()
+                while utterance is None and self.running:
+                    self.cond.wait()
+                    utterance = self._next()
+                if utterance is None:
+                    break
+                utterance.status = "playing"
+                self.current = utterance
+                if self.start is not None:
+                    # Preemption also holds the lock, so this cannot erase its stop()
+                    self.start()
+
+            try:
+                self.play(utterance)
+            except Exception as e:
+                print(f"[Speech] Playback error: {e}")
+            finally:
+                with self.cond:
+                    self.current = None
+                    if utterance.status == "playing":
+                        self.spoken += 1
+                        utterance.status = "done"
+                utterance.finish(utterance.status)
+
+    def clear(self):
+        """Drop everything waiting in the queue"""
+        with self.cond:
+            for utterance in self.queue:
+                utterance.finish("dropped")
+            self.dropped += len(self.queue)
+            self.queue = []
+
+    def shutdown(self, timeout=2):
+        """Stop the worker, interrupting current playback"""
+        self.clear()
+        with self.cond:
+            self.running = False
+            self.cond.notify_all()
+        try:
+            self.stop()
+        except Exception:
+            pass
+        if self.worker is not None:
+            self.worker.join(timeout)
+
+    def stats(self):
+        with self.cond:
+            return {
+                "queued": len(self.queue),
+                "spoken": self.spoken,
+                "dropped": self.dropped,
+                "coalesced": self.coalesced,
+                "preempted": self.preempted,
+            }
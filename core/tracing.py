@@ -0,0 +1,185 @@
+"""End-to-end latency traces from frame capture to spoken announcement
+
+A trace is a small dict that travels with a result through the system:
+
+    {"id": "3f2a...", "agent": "object", "marks": [["capture", t], ["inference", t], ...]}
+
+Each stage appends a (stage, wall-clock time) mark with mark(). The agent
+starts the trace when it reads a frame; the MCP publisher marks the moment
+the message goes on the bus; the master marks receipt, handling and
+logging; speech marks queueing and the start of audio. finish() hands the
+trace to a background writer that appends it as one JSON line to
+memory/traces.jsonl (VISIONAID_TRACE_FILE; VISIONAID_TRACE=0 disables it).
+
+Report the per-agent latency breakdown with:
+
+    python -m core.tracing report
+"""
+import argparse
+import json
+import os
+import queue
+import sys
+import threading
+import time
+import uuid
+from collections import defaultdict
+
+
+DEFAULT_TRACE_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                  "memory", "traces.jsonl")
+TRACE_FILE = os.environ.get("VISIONAID_TRACE_FILE", DEFAULT_TRACE_FILE)
+TRACING_ENABLED = os.environ.get("VISIONAID_TRACE", "1") != "0"
+
+
+def capture_time(source):
+    """Wall-clock capture time of the frame the source returned last"""
+    from core.frame_source import ReplaySource
+    if isinstance(source, ReplaySource):
+        return time.time()  # Replay timestamps are synthetic (index / fps)
+    return getattr(source, "last_timestamp", None) or time.time()
+
+
+def start_trace(agent, captured_at=None):
+    """New trace for a result derived from a frame captured at captured_at"""
+    if not TRACING_ENABLED:
+        return None
+    return {
+        "id": uuid.uuid4().hex[:16],
+        "agent": agent,
+        "marks": [["capture", time.time() if captured_at is None else captured_at]],
+    }
+
+
+def mark(trace, stage, timestamp=None):
+    """Record that trace reached a stage (no-op for None)"""
+    if trace is not None:
+        trace["marks"].append([stage, time.time() if timestamp is None else timestamp])
+    return trace
+
+
+class TraceWriter:
+    """Appends finished traces to a JSON-lines file from a background thread"""
+
+    def __init__(self, path=TRACE_FILE, max_pending=1000):
+        self.path = path
+        self.queue = queue.Queue(maxsize=max_pending)
+        self.thread = None
+        self.lock = threading.Lock()
+        self.written = 0
+        self.dropped = 0
+
+    def _ensure_thread(self):
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, daemon=True, name="TraceWriter")
+                self.thread.start()
+
+    def write(self, trace):
+        self._ensure_thread()
+        try:
+            self.queue.put_nowait(trace)
+        except queue.Full:
+            self.dropped += 1  # Never stall the caller for a trace
+
+    def _run(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        while True:
+            batch = [self.queue.get()]
+            while not self.queue.empty() and len(batch) < 100:
+                batch.append(self.queue.get_nowait())
+            try:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    for trace in batch:
+                        f.write(json.dumps(trace, separators=(",", ":")) + "\n")
+                self.written += len(batch)
+            except OSError as e:
+                print(f"[Trace] Could not write traces: {e}")
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    def flush(self, timeout=2.0):
+        """Wait (up to timeout) until queued traces are on disk"""
+        deadline = time.time() + timeout
+        while self.queue.unfinished_tasks and time.time() < deadline:
+            time.sleep(0.05)
+
+
+writer = TraceWriter()
+
+
+def finish(trace, outcome="spoken"):
+    """Close a trace (once) and queue it for writing"""
+    if trace is None or trace.get("outcome"):
+        return
+    trace["outcome"] = outcome
+    writer.write(trace)
+
+
+def _percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def analyze(path=TRACE_FILE):
+    """Per-agent latency breakdown: p50/p95 of every stage-to-stage step and end to end"""
+    steps = defaultdict(lambda: defaultdict(list))
+    totals = defaultdict(list)
+    outcomes = defaultdict(lambda: defaultdict(int))
+
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                trace = json.loads(line)
+            except ValueError:
+                continue
+            agent = trace.get("agent", "unknown")
+            marks = trace.get("marks", [])
+            outcomes[agent][trace.get("outcome", "unknown")] += 1
+            for (prev_stage, prev_t), (stage, t) in zip(marks, marks[1:]):
+                steps[agent][f"{prev_stage}->{stage}"].append(t - prev_t)
+            if marks and marks[-1][0] == "audio_start":
+                totals[agent].append(marks[-1][1] - marks[0][1])
+
+    report = {}
+    for agent in sorted(outcomes):
+        report[agent] = {
+            "outcomes": dict(outcomes[agent]),
+            "steps_ms": {
+                step: {"count": len(values), "p50": _percentile(values, 50) * 1000,
+                       "p95": _percentile(values, 95) * 1000}
+                for step, values in steps[agent].items()
+            },
+        }
+        if totals[agent]:
+            report[agent]["capture_to_audio_ms"] = {
+                "count": len(totals[agent]),
+                "p50": _percentile(totals[agent], 50) * 1000,
+                "p95": _percentile(totals[agent], 95) * 1000,
+            }
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="VisionAID latency traces")
+    parser.add_argument("command", choices=["report"])
+    parser.add_argument("--file", default=TRACE_FILE)
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.file):
+        print(f"No traces at {args.file}")
+        return 1
+    for agent, result in analyze(args.file).items():
+        print(f"{agent}: {result['outcomes']}")
+        for step, values in result["steps_ms"].items():
+            print(f"  {step:<28} n={values['count']:<5} p50={values['p50']:8.1f} ms  p95={values['p95']:8.1f} ms")
+        total = result.get("capture_to_audio_ms")
+        if total:
+            print(f"  {'capture->audio_start':<28} n={total['count']:<5} p50={total['p50']:8.1f} ms  "
+                  f"p95={total['p95']:8.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,38 +1,219 @@
-import pygame
 from gtts import gTTS
-import tempfile
+import io
 import os
+import re
+import textwrap
 import time
+from concurrent.futures import ThreadPoolExecutor
 from threading import Lock
-import cv2
-pygame.mixer.init()
-from gtts import gTTS
+from core.audio_cache import AudioCache
+from core.audio_player import AudioPlayer
+from core.camera_service import get_camera_service
+from core.metrics import metrics
+from core import tracing
+from core.prompt_pack import PromptPack
+from core.speech_queue import (SpeechService, PRIORITY_URGENT, PRIORITY_HIGH,
+                               PRIORITY_NORMAL, PRIORITY_LOW)
 
-def speak(text):
-    tts = gTTS(text)
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as fp:
-        filename = fp.name
-        tts.save(filename)
+# Long text is spoken in chunks so audio starts after the first sentence
+STREAM_THRESHOLD_CHARS = 150
+STREAM_CHUNK_CHARS = 120
 
-    try:
-        pygame.mixer.init()
-        pygame.mixer.music.load(filename)
-        pygame.mixer.music.play()
+# Speech machinery is built on the first speak() (see _get_speech_service), so
+# importing this module, as every agent and worker process does, touches
+# neither the disk nor the audio device
+audio_cache = None  # Shared phrase cache
+prompt_pack = None  # Pre-synthesized static phrases, played without any synthesis
+player = None  # Single playback engine; the audio device stays open once used
+_synthesis_pool = None  # Synthesizes the next streamed chunk while the current one plays
+speech_service = None
+_speech_lock = Lock()
+
+# Set VISIONAID_TTS_OFFLINE=1 to serve only cached audio
+_offline = os.environ.get("VISIONAID_TTS_OFFLINE") == "1"
+
+
+def _synthesize(text, voice, lang, slow):
+    """Run gTTS and return the MP3 bytes"""
+    buffer = io.BytesIO()
+    with metrics.timer("speech.synthesis_seconds"):
+        gTTS(text, lang=lang, tld=voice, slow=slow).write_to_fp(buffer)
+    return buffer.getvalue()
+
+
+def _fetch_audio(text, voice, lang, slow):
+    """Audio for one phrase: prompt pack, then cache, then gTTS"""
+    rate = "slow" if slow else "normal"
+    with metrics.timer("speech.fetch_seconds"):
+        audio = prompt_pack.get(text, voice, lang, rate)
+        if audio is None:
+            audio = audio_cache.get_or_synthesize(
+                text, lambda: _synthesize(text, voice, lang, slow),
+                voice=voice, lang=lang, rate=rate
+            )
+    return audio
+
+
+_SENTENCE_END = re.compile(r"(?<=[.!?;:])\s+|\n\s*\n")
+_CLAUSE_END = re.compile(r"(?<=,)\s+")
 
-        while pygame.mixer.music.get_busy():
-            time.sleep(0.1)
-    finally:
+
+def split_sentences(text, max_chars=STREAM_CHUNK_CHARS, min_chars=20):
+    """Split text into sentence/clause chunks no longer than max_chars"""
+    chunks = []
+    for sentence in _SENTENCE_END.split(text.strip()):
+        sentence = " ".join(sentence.split())  # OCR text is full of line breaks
+        if not sentence:
+            continue
+
+        if len(sentence) <= max_chars:
+            parts = [sentence]
+        else:
+            # Break long sentences at commas, then at word boundaries
+            parts = []
+            for clause in _CLAUSE_END.split(sentence):
+                parts.extend(textwrap.wrap(clause, max_chars))
+
+        for part in parts:
+            # Glue tiny fragments onto the previous chunk to keep prosody natural
+            if chunks and len(chunks[-1]) < min_chars and len(chunks[-1]) + len(part) < max_chars:
+                chunks[-1] = f"{chunks[-1]} {part}"
+            else:
+                chunks.append(part)
+    return chunks
+
+
+def _play_streaming(utterance, voice, lang, slow):
+    """Play chunk N while chunk N+1 is being synthesized"""
+    if isinstance(utterance.text, (list, tuple)):
+        # Separate messages: split each on its own so no chunk spans two of them
+        chunks = [chunk for message in utterance.text for chunk in split_sentences(message)]
+    else:
+        chunks = split_sentences(utterance.text)
+    if not chunks:
+        return
+    rate = "slow" if slow else "normal"
+    pending = _synthesis_pool.submit(_fetch_audio, chunks[0], voice, lang, slow)
+
+    for i, chunk in enumerate(chunks):
         try:
-            pygame.mixer.quit()
-            os.remove(filename)
+            audio = pending.result()
         except Exception as e:
-            print(f"Cleanup warning: {e}")
+            print(f"Speech synthesis failed: {e}")
+            return
+        if i + 1 < len(chunks):
+            pending = _synthesis_pool.submit(_fetch_audio, chunks[i + 1], voice, lang, slow)
+        if audio is None:
+            continue
+        if utterance.status != "playing":
+            return
+
+        # Only the first chunk counts toward enqueue -> first-sample latency
+        player.play(audio, key=AudioCache.make_key(chunk, voice, lang, rate),
+                    enqueued_at=utterance.enqueued_at if i == 0 else None,
+                    on_start=_trace_audio_start(utterance) if i == 0 else None)
+
+
+def _trace_audio_start(utterance):
+    """Close the utterance's trace (if any) when its audio starts"""
+    trace = utterance.options.get("trace")
+    if trace is None:
+        return None
+
+    def _started():
+        tracing.mark(trace, "audio_start")
+        tracing.finish(trace, "spoken")
+    return _started
+
+
+def _play_utterance(utterance):
+    """Synthesize (or fetch from cache) and play one queued utterance"""
+    voice = utterance.options.get("voice", "com")
+    lang = utterance.options.get("lang", "en")
+    slow = utterance.options.get("slow", False)
+    stream = utterance.options.get("stream")
+    text = utterance.text
+    metrics.histogram("speech.queue_wait_seconds").observe(time.time() - utterance.enqueued_at)
+
+    if stream or isinstance(text, (list, tuple)) or (stream is None and len(text) > STREAM_THRESHOLD_CHARS):
+        _play_streaming(utterance, voice, lang, slow)
+        return
+
+    try:
+        audio = _fetch_audio(text, voice, lang, slow)
+    except Exception as e:
+        print(f"Speech synthesis failed: {e}")
+        return
+    if audio is None or utterance.status != "playing":
+        return
+
+    player.play(audio, key=AudioCache.make_key(text, voice, lang, "slow" if slow else "normal"),
+                enqueued_at=utterance.enqueued_at, on_start=_trace_audio_start(utterance))
+
+
+def _get_speech_service():
+    """Build the cache, prompt pack, player and speech worker on first use"""
+    global audio_cache, prompt_pack, player, _synthesis_pool, speech_service
+    if speech_service is not None:
+        return speech_service
+    with _speech_lock:
+        if speech_service is None:
+            audio_cache = AudioCache(offline_only=_offline)
+            prompt_pack = PromptPack.load()
+            player = AudioPlayer()
+            _synthesis_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="SpeechSynth")
+            speech_service = SpeechService(_play_utterance, player.stop, start=player.reset)
+    return speech_service
+
+
+def speak(text, priority=PRIORITY_NORMAL, kind=None, wait=False, max_age=None,
+          stream=None, voice="com", lang="en", slow=False, trace=None):
+    """Queue text for speech; returns immediately unless wait=True
+
+    text: a string, or a list of messages streamed in order, each chunked
+        separately so chunk boundaries follow the messages.
+    priority: more urgent speech is played first; only PRIORITY_URGENT also
+        interrupts lower-priority speech that is already playing.
+    kind: a newer utterance of the same kind replaces a queued older one.
+    max_age: drop the utterance if it has waited longer than this (seconds).
+    stream: speak sentence by sentence, synthesizing ahead while playing
+        (default: only for text longer than STREAM_THRESHOLD_CHARS).
+    trace: a core.tracing trace, closed when the audio starts (or is dropped).
+    """
+    metrics.counter("speech.requests").inc()
+    tracing.mark(trace, "queued")
+    utterance = _get_speech_service().say(text, priority=priority, kind=kind, max_age=max_age,
+                                   stream=stream, voice=voice, lang=lang, slow=slow, trace=trace)
+    if trace is not None:
+        # Spoken traces are closed at audio start; this catches drops and failures
+        utterance.add_done_callback(
+            lambda u: tracing.finish(trace, "no_audio" if u.status == "done" else u.status))
+    if wait:
+        utterance.wait()
+    return utterance
+
+
+def set_offline(offline=True):
+    """Serve speech only from the phrase cache (no network synthesis)"""
+    global _offline
+    _offline = offline
+    if audio_cache is not None:
+        audio_cache.offline_only = offline
+
 
+def get_camera(device=0):
+    """Subscribe to the shared camera service (drop-in for cv2.VideoCapture)
 
+    When VISIONAID_FRAME_BUS names a running shared-memory frame bus (see
+    core.frame_bus), frames are read from it instead, so agents in separate
+    processes share one capture without copies.
+    """
+    bus_name = os.environ.get("VISIONAID_FRAME_BUS")
+    if bus_name:
+        from core.frame_bus import FrameBusSubscription
+        return FrameBusSubscription(bus_name)
 
-def get_camera():
-    """Camera initialization helper"""
-    cap = cv2.VideoCapture(0)
+    cap = get_camera_service(device).subscribe()
     if not cap.isOpened():
         raise RuntimeError("Camera error")
     return cap
@@ -0,0 +1,257 @@
+"""Concurrent multi-agent vision pipeline
+
+Several vision agents share one frame stream instead of taking turns through
+MasterAgent.switch_agent. A pipeline is a small DAG of named nodes:
+
+    source        the frame stream (exactly one)
+    motion_gate   passes a frame on only when the scene changed
+    agent         calls agent.process_frame(frame, captured_at) at up to `fps`
+
+For example, frame -> motion gate -> {object detection at 5 FPS, barcode at
+10 FPS} is the "assist" pipeline below.
+
+Scheduling keeps the whole pipeline real-time on a CPU-only machine:
+
+* One capture thread reads each frame once and runs every gate on it once.
+* Each agent has its own thread and always takes the newest frame, so slow
+  agents skip frames instead of queueing them.
+* Each agent runs at most `fps` times per second. Its `cpu_share` caps how
+  much of wall-clock time it may spend busy: an inference that takes d
+  seconds is followed by an idle period of d * (1 - share) / share. Shares
+  are normalised when they add up to more than 1.
+"""
+import threading
+import time
+
+from core.frame_source import open_frame_source
+from core.metrics import metrics
+from core.motion_gate import MotionGate
+from core.tracing import capture_time
+
+
+PIPELINES = {
+    "assist": {
+        "display_name": "Assist (objects + barcodes)",
+        "nodes": {
+            "frame": {"type": "source"},
+            "motion": {"type": "motion_gate", "input": "frame"},
+            "object_detection": {"type": "agent", "input": "motion", "fps": 5, "cpu_share": 0.6},
+            "barcode_scanner": {"type": "agent", "input": "motion", "fps": 10, "cpu_share": 0.3},
+        },
+    },
+}
+
+
+class PipelineStage:
+    """One agent node: its pacing state and counters"""
+
+    def __init__(self, name, input_name, fps, cpu_share):
+        self.name = name
+        self.input_name = input_name
+        self.fps = fps
+        self.cpu_share = cpu_share
+        self.agent = None
+
+        # Counters
+        self.runs = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+        self.started_at = None
+        self.last_latency = 0.0  # Frame capture to result, seconds
+
+    def next_due(self, started, finished):
+        """Earliest time of the next run given the fps cap and the CPU share"""
+        duration = finished - started
+        by_rate = started + 1.0 / self.fps
+        by_share = finished + duration * (1.0 - self.cpu_share) / self.cpu_share
+        return max(by_rate, by_share)
+
+    def stats(self):
+        elapsed = time.time() - self.started_at if self.started_at else 0.0
+        return {
+            "target_fps": self.fps,
+            "fps": self.runs / elapsed if elapsed else 0.0,
+            "cpu_share": self.cpu_share,
+            "busy": self.busy_seconds / elapsed if elapsed else 0.0,
+            "runs": self.runs,
+            "errors": self.errors,
+            "latency_ms": self.last_latency * 1000,
+        }
+
+
+class VisionPipeline:
+    """Runs the agent nodes of a pipeline spec concurrently on one frame stream
+
+    get_agent(name) returns the agent instance for an agent node (the master's
+    lazy loader); agents must provide process_frame(frame, captured_at=None).
+    Agents open their own frame source only in run(), which the pipeline never
+    calls, so the only open source is the pipeline's; terminate() still
+    terminates each stage agent to release whatever it holds.
+    """
+
+    def __init__(self, spec, get_agent, source=None):
+        if isinstance(spec, str):
+            spec = PIPELINES[spec]
+        self.display_name = spec.get("display_name", "Vision pipeline")
+        self.get_agent = get_agent
+        self.source_spec = source
+        self.source = None
+
+        self.gates = {}  # node name -> MotionGate
+        self.stages = []
+        self._build(spec["nodes"])
+
+        self.running = False
+        self.threads = []
+        self.cond = threading.Condition()
+        self.frame = None
+        self.frame_time = 0.0
+        self.seq = 0
+        self.latest = {}  # input node name -> seq of the newest frame it passed
+        self.frames_read = 0
+
+    def _build(self, nodes):
+        sources = [name for name, node in nodes.items() if node["type"] == "source"]
+        if len(sources) != 1:
+            raise ValueError("A pipeline needs exactly one source node")
+        self.source_name = sources[0]
+
+        for name, node in nodes.items():
+            kind = node["type"]
+            if kind == "source":
+                continue
+            input_name = node.get("input", self.source_name)
+            if input_name not in nodes:
+                raise ValueError(f"Node '{name}' reads from unknown node '{input_name}'")
+            input_type = nodes[input_name]["type"]
+
+            if kind == "motion_gate":
+                if input_type != "source":
+                    raise ValueError(f"Motion gate '{name}' must read from the source")
+                options = {k: v for k, v in node.items() if k not in ("type", "input")}
+                self.gates[name] = MotionGate(**options)
+            elif kind == "agent":
+                if input_type not in ("source", "motion_gate"):
+                    raise ValueError(f"Agent '{name}' must read from the source or a motion gate")
+                self.stages.append(PipelineStage(name, input_name, node.get("fps", 5.0),
+                                                 node.get("cpu_share", 0.5)))
+            else:
+                raise ValueError(f"Unknown node type '{kind}' for '{name}'")
+
+        total_share = sum(stage.cpu_share for stage in self.stages)
+        if total_share > 1.0:
+            for stage in self.stages:
+                stage.cpu_share /= total_share
+
+    def run_non_blocking(self):
+        """Open the source and start the capture and agent threads"""
+        if self.running:
+            return
+        self.source = open_frame_source(self.source_spec)
+        self.running = True
+        self.latest = {self.source_name: 0, **{name: 0 for name in self.gates}}
+        self.threads = [threading.Thread(target=self._capture, daemon=True, name="PipelineCapture")]
+        self.threads += [
+            threading.Thread(target=self._run_stage, args=(stage,), daemon=True, name=f"Pipeline-{stage.name}")
+            for stage in self.stages
+        ]
+        for thread in self.threads:
+            thread.start()
+        print(f"[Pipeline] Started {', '.join(f'{s.name}@{s.fps:g}fps' for s in self.stages)}")
+
+    def run(self):
+        """Run until terminate() is called"""
+        self.run_non_blocking()
+        for thread in self.threads:
+            thread.join()
+
+    def _capture(self):
+        try:
+            while self.running:
+                ret, frame = self.source.read()
+                if not ret:
+                    print("[Pipeline] Frame source ended")
+                    break
+                frame.flags.writeable = False  # Shared by every agent thread
+                now = time.time()
+                passed = [name for name, gate in self.gates.items() if gate.changed(frame, now)]
+
+                with self.cond:
+                    self.seq += 1
+                    self.frames_read += 1
+                    self.frame = frame
+                    self.frame_time = capture_time(self.source)
+                    self.latest[self.source_name] = self.seq
+                    for name in passed:
+                        self.latest[name] = self.seq
+                    self.cond.notify_all()
+        finally:
+            with self.cond:
+                self.running = False
+                self.cond.notify_all()
+
+    def _run_stage(self, stage):
+        try:
+            stage.agent = self.get_agent(stage.name)  # Agents load in parallel
+        except Exception as e:
+            print(f"[Pipeline] Could not load {stage.name}: {e}")
+            return
+        stage.started_at = time.time()
+        due = 0.0
+        last_seq = 0
+
+        while self.running:
+            delay = due - time.time()
+            if delay > 0:
+                time.sleep(delay)
+
+            # Wait for a frame newer than the last one this agent handled
+            with self.cond:
+                while self.running and self.latest[stage.input_name] <= last_seq:
+                    self.cond.wait(0.5)
+                if not self.running:
+                    break
+                last_seq = self.latest[stage.input_name]
+                frame = self.frame
+                frame_time = self.frame_time
+
+            started = time.time()
+            try:
+                stage.agent.process_frame(frame, captured_at=frame_time)
+            except Exception as e:
+                stage.errors += 1
+                print(f"[Pipeline] {stage.name} failed on a frame: {e}")
+            finished = time.time()
+
+            stage.runs += 1
+            stage.busy_seconds += finished - started
+            metrics.histogram(f"pipeline.{stage.name}.process_seconds").observe(finished - started)
+            metrics.histogram(f"pipeline.{stage.name}.latency_seconds").observe(finished - frame_time)
+            stage.last_latency = finished - frame_time
+            due = stage.next_due(started, finished)
+
+    def terminate(self):
+        """Stop all threads, terminate the stage agents and release the frame source"""
+        with self.cond:
+            self.running = False
+            self.cond.notify_all()
+        for thread in self.threads:
+            if thread is not threading.current_thread():
+                thread.join(2)
+        for stage in self.stages:
+            agent, stage.agent = stage.agent, None
+            if agent is not None and hasattr(agent, "terminate"):
+                try:
+                    agent.terminate()
+                except Exception as e:
+                    print(f"[Pipeline] Error terminating {stage.name}: {e}")
+        if self.source is not None:
+            self.source.release()
+            self.source = None
+
+    def stats(self):
+        return {
+            "frames_read": self.frames_read,
+            "gates": {name: gate.stats() for name, gate in self.gates.items()},
+            "stages": {stage.name: stage.stats() for stage in self.stages},
+        }
@@ -16,6 +16,7 @@ class VoiceControl:
             "find product": "ecommerce_agent",
             "search online": "ecommerce_agent",
             "ecommerce_agent": "ecommerce_agent",
+            "assist": "assist",
             "exit": "exit"
         }
 
@@ -31,7 +32,7 @@ class VoiceControl:
                 "navigation": "Navigation",
                 "ecommerce_agent": "Search Online"
             }
-            speak("Say a command: " + ", ".join(friendly_names.values()))
+            speak("Say a command: " + ", ".join(friendly_names.values()), wait=True)
 
             try:
                 audio = self.recognizer.listen(source, timeout=5)
@@ -71,7 +71,7 @@ class EcommerceAgent:
 
         for attempt in range(max_attempts):
             try:
-                speak("Would you like to search for another product? Please say 'yes' or 'no'.")
+                speak("Would you like to search for another product? Please say 'yes' or 'no'.", wait=True)
                 print("\n🔁 Listening for your response... (Say 'yes' or 'no')")
 
                 with sr.Microphone() as source:
@@ -96,7 +96,7 @@ class EcommerceAgent:
                 break  # Exit on unexpected errors
 
         # Fallback to keyboard input after max attempts
-        speak("Switching to keyboard input. Please type 'yes' or 'no'.")
+        speak("Switching to keyboard input. Please type 'yes' or 'no'.", wait=True)
         user_input = input("(Voice failed) Type 'yes' or 'no': ").strip().lower()
         return user_input in ["yes", "y"]
 
@@ -214,10 +214,8 @@ class EcommerceAgent:
         else:
             speak_output.append("No customer reviews available.")
 
-        # Speak all output with pauses
-        for message in speak_output:
-            speak(message)
-            time.sleep(0.3)
+        # Speak as one streamed utterance so each message is synthesized while the previous plays
+        speak(speak_output, stream=True)
 
 
 
@@ -5,22 +5,33 @@ import scipy.io.wavfile as wav
 import os
 import logging
 from core.utils import speak
+from core.model_registry import model_registry
 from transformers import pipeline
 
 class ProductCaptureAgent:
     def __init__(self):
         self.logger = logging.getLogger(__name__)
-        self.model = whisper.load_model("small.en")
         self.sample_rate = 16000
         self.duration = 7
 
-        # 🧠 Add HuggingFace Zero-Shot Classifier
-        self.classifier = pipeline("zero-shot-classification", model="facebook/bart-large-mnli")
+        # 🧠 HuggingFace Zero-Shot Classifier (see classifier property)
         self.categories = ["electronics", "clothing", "books", "home", "groceries", "beauty", "sports"]
 
+    @property
+    def model(self):
+        """Whisper model shared with DialogAgent through the model registry"""
+        return model_registry.get("whisper-small.en", lambda: whisper.load_model("small.en"))
+
+    @property
+    def classifier(self):
+        return model_registry.get(
+            "bart-large-mnli",
+            lambda: pipeline("zero-shot-classification", model="facebook/bart-large-mnli")
+        )
+
     def record_audio(self, prompt):
         try:
-            speak(prompt)
+            speak(prompt, wait=True)
             recording = sd.rec(int(self.duration * self.sample_rate), samplerate=self.sample_rate, channels=1, dtype='int16')
             sd.wait()
             with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_file:
@@ -5,14 +5,13 @@ import tempfile
 import os
 import scipy.io.wavfile as wav
 from core.utils import speak
+from core.model_registry import model_registry
 from typing import Tuple, Optional
 import logging
 
 
 class DialogAgent:
     def __init__(self):
-        # Initialize with better whisper model configuration
-        self.model = whisper.load_model("small.en")  # Better accuracy for English
         self.sample_rate = 16000
         self.recording_duration = 7  # Increased from 5 seconds
         self.logger = logging.getLogger(__name__)
@@ -25,10 +24,15 @@ class DialogAgent:
             'bus halt': ['bus stop', 'bus station', 'bus halt', 'transit']
         }
 
+    @property
+    def model(self):
+        """Shared Whisper model (small.en for better English accuracy), loaded on demand"""
+        return model_registry.get("whisper-small.en", lambda: whisper.load_model("small.en"))
+
     def record_audio(self) -> str:
         """Record audio with better error handling and feedback"""
         try:
-            speak("Where would you like to go? Examples: hospital, school, supermarket, or bus stop.")
+            speak("Where would you like to go? Examples: hospital, school, supermarket, or bus stop.", wait=True)
             self.logger.info("Starting recording...")
 
             # Improved audio recording with device verification
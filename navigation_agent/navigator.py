@@ -15,7 +15,7 @@ class Navigator:
             if not self.active:
                 speak("Navigation stopped.")
                 return
-            speak(f"Step {i}: {step}")
+            speak(f"Step {i}: {step}", wait=True)
             time.sleep(2)
 
     def stop_guidance(self):
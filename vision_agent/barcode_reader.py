@@ -1,51 +1,60 @@
 import cv2
 from pyzbar import pyzbar
 import requests
-from core.utils import speak
+from core.utils import speak, PRIORITY_URGENT
+from core.frame_source import open_frame_source
+from core.motion_gate import MotionGate
+from core.mcp_client import get_publisher
+from core.metrics import metrics
+from core.tracing import start_trace, mark, capture_time
 import time
 import warnings
-import zmq
 import json
 
 
 class BarcodeReaderAgent:
-    def __init__(self):
-        self.running = True
-        self.camera = cv2.VideoCapture(0)
+    def __init__(self, source=None, motion_gate=None):
+        self.running = False
+        self.source = source  # Frame source spec, opened when run() starts
         self.last_scanned = None
         self.scan_cooldown = 3
         self.min_confidence = 30
 
-        # MCP Setup (non-blocking PUB)
-        self.context = zmq.Context()
-        self.mcp_socket = self.context.socket(zmq.PUB)
-        self.mcp_socket.connect("tcp://localhost:5555")
+        # Optional change detection: skip decoding while the scene is static
+        self.motion_gate = MotionGate() if motion_gate is True else motion_gate
+        self.last_barcodes = None
 
-        if not self.camera.isOpened():
-            raise RuntimeError("Could not open camera")
+        # MCP Setup (shared non-blocking client)
+        self.mcp = get_publisher()
 
-    def _publish_to_mcp(self, barcode_data, product_info):
+    def _publish_to_mcp(self, barcode_data, product_info, trace=None):
         try:
-            self.mcp_socket.send_json({
-                "source": "vision",
-                "agent": "barcode",
-                "data": {
-                    "code": barcode_data,
-                    "product": product_info[0] if product_info else None,
-                    "brand": product_info[1] if product_info else None,
-                },
-                "timestamp": time.time()
-            })
+            self.mcp.publish("barcode", {
+                "code": barcode_data,
+                "product": product_info[0] if product_info else None,
+                "brand": product_info[1] if product_info else None,
+            }, trace=trace)
         except Exception as e:
             print(f"[MCP ERROR] Failed to publish: {e}")
 
     def run(self):
+        self.running = True
+        self.last_barcodes = None  # Nothing carries over from an earlier session
+        self.last_scanned = None
+        if self.motion_gate is not None:
+            self.motion_gate.reset()
+        camera = None  # Local: terminate() may run on another thread mid-read
         try:
             warnings.filterwarnings("ignore", category=RuntimeWarning)
 
-            test_ret, test_frame = self.camera.read()
+            camera = open_frame_source(self.source)
+            if not camera.isOpened():
+                speak("Camera failed to initialize", priority=PRIORITY_URGENT)
+                return
+
+            test_ret, test_frame = camera.read()
             if not test_ret:
-                speak("Camera failed to initialize")
+                speak("Camera failed to initialize", priority=PRIORITY_URGENT)
                 return
 
             cv2.imshow("Camera Test", test_frame)
@@ -53,50 +62,23 @@ class BarcodeReaderAgent:
             cv2.destroyWindow("Camera Test")
 
             while self.running:
-                ret, frame = self.camera.read()
+                with metrics.timer("barcode.capture_seconds"):
+                    ret, frame = camera.read()
                 if not ret:
-                    speak("Camera error occurred")
+                    speak("Camera error occurred", priority=PRIORITY_URGENT)
                     break
+                metrics.counter("barcode.frames").inc()
 
-                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-                barcodes = pyzbar.decode(gray, symbols=[
-                    pyzbar.ZBarSymbol.QRCODE,
-                    pyzbar.ZBarSymbol.EAN13,
-                    pyzbar.ZBarSymbol.CODE128
-                ])
+                if (self.motion_gate is None or self.last_barcodes is None or
+                        self.motion_gate.changed(frame)):
+                    self.last_barcodes = self.decode(frame)
+                else:
+                    metrics.counter("barcode.frames_skipped").inc()
+                barcodes = self.last_barcodes
 
+                captured_at = capture_time(camera)
                 for barcode in barcodes:
-                    try:
-                        barcode_data = barcode.data.decode('utf-8')
-                        current_time = time.time()
-
-                        if (barcode_data != self.last_scanned or
-                                (current_time - getattr(self, 'last_scanned_time', 0)) > self.scan_cooldown):
-                            product_info = self.lookup_product(barcode_data)
-                            feedback = self.format_feedback(barcode_data, product_info)
-
-                            # Debug log before publishing to MCP
-                            print(f"[DEBUG] Publishing to MCP - Barcode: {barcode_data}, Product: {product_info}")
-
-                            # MCP publishing
-                            self._publish_to_mcp(barcode_data, product_info)
-
-                            # Drawing rectangle
-                            x, y, w, h = barcode.rect
-                            cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 4)
-
-                            (tw, th), _ = cv2.getTextSize(feedback[:50], cv2.FONT_HERSHEY_SIMPLEX, 0.7, 2)
-                            cv2.rectangle(frame, (x, y - th - 10), (x + tw, y), (0, 255, 0), -1)
-                            cv2.putText(frame, feedback[:50], (x, y - 10),
-                                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
-
-                            speak(feedback)
-                            self.last_scanned = barcode_data
-                            self.last_scanned_time = current_time
-
-                    except Exception as e:
-                        print(f"Barcode error: {e}")
-                        continue
+                    self._handle_barcode(barcode, frame, captured_at)
 
                 # UI
                 cv2.putText(frame, "Scan a barcode/QR code", (20, 30),
@@ -111,9 +93,69 @@ class BarcodeReaderAgent:
         except Exception as e:
             speak(f"Scanning error: {str(e)}")
         finally:
-            self.terminate()
+            self.running = False
+            if camera is not None:
+                camera.release()
+            cv2.destroyAllWindows()
+            self.mcp.flush()
             warnings.resetwarnings()
 
+    def _handle_barcode(self, barcode, frame=None, captured_at=None):
+        """Look up, publish and announce a new barcode; draws on frame if given"""
+        try:
+            barcode_data = barcode.data.decode('utf-8')
+            current_time = time.time()
+
+            if (barcode_data != self.last_scanned or
+                    (current_time - getattr(self, 'last_scanned_time', 0)) > self.scan_cooldown):
+                metrics.counter("barcode.scans").inc()
+                trace = mark(start_trace("barcode", captured_at), "decode")
+                with metrics.timer("barcode.lookup_seconds"):
+                    product_info = self.lookup_product(barcode_data)
+                mark(trace, "lookup")
+                feedback = self.format_feedback(barcode_data, product_info)
+
+                # Debug log before publishing to MCP
+                print(f"[DEBUG] Publishing to MCP - Barcode: {barcode_data}, Product: {product_info}")
+
+                # MCP publishing
+                with metrics.timer("barcode.publish_seconds"):
+                    self._publish_to_mcp(barcode_data, product_info, trace)
+
+                if frame is not None:
+                    # Drawing rectangle
+                    x, y, w, h = barcode.rect
+                    cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 4)
+
+                    (tw, th), _ = cv2.getTextSize(feedback[:50], cv2.FONT_HERSHEY_SIMPLEX, 0.7, 2)
+                    cv2.rectangle(frame, (x, y - th - 10), (x + tw, y), (0, 255, 0), -1)
+                    cv2.putText(frame, feedback[:50], (x, y - 10),
+                                cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+
+                speak(feedback, kind="barcode")
+                self.last_scanned = barcode_data
+                self.last_scanned_time = current_time
+
+        except Exception as e:
+            print(f"Barcode error: {e}")
+
+    def process_frame(self, frame, captured_at=None):
+        """Decode and announce barcodes in one frame without any display (vision pipeline)"""
+        barcodes = self.decode(frame)
+        for barcode in barcodes:
+            self._handle_barcode(barcode, captured_at=captured_at)
+        return barcodes
+
+    def decode(self, frame):
+        """Find QR/EAN13/Code128 barcodes in one frame"""
+        with metrics.timer("barcode.decode_seconds"):
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            return pyzbar.decode(gray, symbols=[
+                pyzbar.ZBarSymbol.QRCODE,
+                pyzbar.ZBarSymbol.EAN13,
+                pyzbar.ZBarSymbol.CODE128
+            ])
+
     def format_feedback(self, code, product_info):
         if product_info:
             name, brand, quantity, ingredients = product_info
@@ -141,13 +183,8 @@ class BarcodeReaderAgent:
         return None
 
     def terminate(self):
+        """Ask run() to stop; it releases the camera itself (safe from any thread)"""
         self.running = False
-        self.camera.release()
-        cv2.destroyAllWindows()
-        if hasattr(self, 'mcp_socket'):
-            self.mcp_socket.close()
-        if hasattr(self, 'context'):
-            self.context.term()
 
 
 if __name__ == "__main__":
@@ -1,69 +1,69 @@
 import cv2
 import pytesseract
-from core.utils import speak
+from core.utils import speak, PRIORITY_URGENT
+from core.frame_source import open_frame_source
 import numpy as np
-import zmq
 import time
-from core.mcp_logger import MCPLogger
+from core.mcp_client import get_publisher
+from core.metrics import metrics
+from core.tracing import start_trace, mark, capture_time
 
 
 
 class DocumentOCRAgent:
-    def __init__(self):
-        self.running = True
-        self.camera = cv2.VideoCapture(0)
+    def __init__(self, source=None):
+        self.running = False
+        self.source = source  # Frame source spec, opened when run() starts
 
-        # MCP Setup (ZeroMQ Publisher)
-        self.context = zmq.Context()
-        self.mcp_socket = self.context.socket(zmq.PUB)
-        self.mcp_socket.connect("tcp://localhost:5555")  # Connect to MCP
-        self.logger = MCPLogger()
+        # MCP Setup (shared publisher client)
+        self.mcp = get_publisher()  # The master logs what arrives on the bus
 
         # Tesseract path (update if needed)
         pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
 
-        if not self.camera.isOpened():
-            raise RuntimeError("Could not open camera")
-
-    def _publish_to_mcp(self, text):
-        """Send OCR results to MCP and SQLite"""
-        message = {
-            "source": "vision",
-            "agent": "document",
-            "data": {
-                "text": text[:1000],
-                "char_count": len(text)
-            },
-            "timestamp": time.time()
+    def _publish_to_mcp(self, text, trace=None):
+        """Send OCR results to MCP"""
+        data = {
+            "text": text[:1000],
+            "char_count": len(text)
         }
 
         # Send to MCP (ZeroMQ)
-        self.mcp_socket.send_json(message)
-
-        # Also log into SQLite
-        self.logger.insert_message(message)
+        self.mcp.publish("document", data, timestamp=time.time(), trace=trace)
 
     def run(self):
         """Main execution loop called by master agent"""
+        self.running = True
+        camera = None  # Local: terminate() may run on another thread mid-read
         try:
+            camera = open_frame_source(self.source)
+            if not camera.isOpened():
+                speak("Could not open camera", priority=PRIORITY_URGENT)
+                return
+
             while self.running:
-                ret, frame = self.camera.read()
+                with metrics.timer("document.capture_seconds"):
+                    ret, frame = camera.read()
                 if not ret:
-                    speak("Failed to capture frame")
+                    speak("Failed to capture frame", priority=PRIORITY_URGENT)
                     break
 
                 self._display_ui(frame)
                 key = cv2.waitKey(1)
 
                 if key == ord('s'):  # Scan command
-                    self._process_document(frame)
+                    self._process_document(frame, capture_time(camera))
                 elif key == ord('q'):  # Quit command
                     break
 
         except Exception as e:
             speak(f"Document scanning error: {str(e)}")
         finally:
-            self.terminate()
+            self.running = False
+            if camera is not None:
+                camera.release()
+            cv2.destroyAllWindows()
+            self.mcp.flush()
 
     def _display_ui(self, frame):
         """Show instructions and camera feed"""
@@ -73,24 +73,34 @@ class DocumentOCRAgent:
                     cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 0, 0), 2)
         cv2.imshow("Document Scanner", frame)
 
-    def _process_document(self, frame):
-        """Handle OCR processing and MCP publishing"""
+    def extract_text(self, frame):
+        """Crop, preprocess and OCR one frame"""
 
         # Optional: crop document region if detected
-        region = self._detect_document_region(frame)
-        if region:
-            x, y, w, h = region
-            frame = frame[y:y + h, x:x + w]
+        with metrics.timer("document.preprocess_seconds"):
+            region = self._detect_document_region(frame)
+            if region:
+                x, y, w, h = region
+                frame = frame[y:y + h, x:x + w]
 
-        processed_image = self._preprocess_image(frame)
+            processed_image = self._preprocess_image(frame)
         custom_config = r'--oem 3 --psm 6'
-        text = pytesseract.image_to_string(processed_image, config=custom_config)
+        with metrics.timer("document.ocr_seconds"):
+            return pytesseract.image_to_string(processed_image, config=custom_config)
+
+    def _process_document(self, frame, captured_at=None):
+        """Handle OCR processing and MCP publishing"""
+        metrics.counter("document.scans").inc()
+        trace = start_trace("document", captured_at)
+        text = self.extract_text(frame)
+        mark(trace, "ocr")
 
         if text.strip():
-            self._publish_to_mcp(text)
+            with metrics.timer("document.publish_seconds"):
+                self._publish_to_mcp(text, trace)
             speak("I found some text. Here's what I see:")
             print("Extracted Text:", text)
-            speak(text[:300])
+            speak(text[:300], stream=True)
         else:
             speak("No text detected in the document")
 
@@ -122,12 +132,8 @@ class DocumentOCRAgent:
         return None
 
     def terminate(self):
-        """Cleanup for master agent"""
+        """Ask run() to stop; it releases the camera itself (safe from any thread)"""
         self.running = False
-        self.camera.release()
-        cv2.destroyAllWindows()
-        self.context.destroy()
-        self.logger.close()
 
 
 if __name__ == "__main__":
@@ -1,17 +1,29 @@
 import threading
-import zmq
 import cv2
 import torch
 from PIL import Image
 import time
 import pyttsx3  # For text-to-speech
 from transformers import AutoModelForImageClassification, AutoImageProcessor
+from core.frame_source import open_frame_source
+from core.motion_gate import MotionGate
+from core.model_registry import model_registry
+from core.mcp_client import get_publisher
+from core.metrics import metrics
+from core.tracing import start_trace, mark, capture_time
 
 
 class EmotionDetectionAgent:
-    def __init__(self):
-        self.device = "cuda" if torch.cuda.is_available() else "cpu"
+    DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
+
+    def __init__(self, source=None, motion_gate=None):
+        self.device = self.DEVICE
+        self.source = source  # Frame source spec, opened when run() starts
+
+        # Optional change detection: reuse the last result while the scene is static
+        self.motion_gate = MotionGate() if motion_gate is True else motion_gate
         self.running = False
+        self.mcp = get_publisher()  # Publishes only when the top emotion changes
         self.last_spoken_emotion = None
         self.last_spoken_time = 0
         self.speech_cooldown = 3  # seconds between speech outputs
@@ -20,10 +32,7 @@ class EmotionDetectionAgent:
         self.tts_engine = pyttsx3.init()
         self.tts_engine.setProperty('rate', 150)  # Slower speech rate
 
-        # Load emotion detection model
-        self.model = AutoModelForImageClassification.from_pretrained(
-            "dima806/facial_emotions_image_detection"
-        ).to(self.device)
+        # Emotion detection model is loaded through the registry (see model property)
         self.processor = AutoImageProcessor.from_pretrained(
             "dima806/facial_emotions_image_detection"
         )
@@ -44,6 +53,29 @@ class EmotionDetectionAgent:
             cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
         )
 
+    @classmethod
+    def load_model(cls):
+        return model_registry.get(
+            "emotion-vit",
+            lambda: AutoModelForImageClassification.from_pretrained(
+                "dima806/facial_emotions_image_detection"
+            ).to(cls.DEVICE)
+        )
+
+    @property
+    def model(self):
+        return self.load_model()
+
+    @classmethod
+    def preload(cls):
+        """Load and warm up the model without building an agent (master prewarm)
+
+        The dummy forward pass takes a blank 224x224 image tensor directly, so
+        the image processor isn't needed yet.
+        """
+        with torch.no_grad():
+            cls.load_model()(pixel_values=torch.zeros((1, 3, 224, 224), device=cls.DEVICE))
+
     def speak_emotion(self, emotion):
         current_time = time.time()
         if (emotion != self.last_spoken_emotion or
@@ -54,8 +86,9 @@ class EmotionDetectionAgent:
             self.last_spoken_time = current_time
 
     def detect_emotion(self, frame):
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        faces = self.face_cascade.detectMultiScale(gray, 1.3, 5)
+        with metrics.timer("emotion.face_detect_seconds"):
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            faces = self.face_cascade.detectMultiScale(gray, 1.3, 5)
 
         if len(faces) == 0:
             return []
@@ -64,8 +97,9 @@ class EmotionDetectionAgent:
         face_roi = frame[y:y + h, x:x + w]
         image = Image.fromarray(cv2.cvtColor(face_roi, cv2.COLOR_BGR2RGB))
 
-        inputs = self.processor(images=image, return_tensors="pt").to(self.device)
-        with torch.no_grad():
+        with metrics.timer("emotion.preprocess_seconds"):
+            inputs = self.processor(images=image, return_tensors="pt").to(self.device)
+        with metrics.timer("emotion.inference_seconds"), torch.no_grad():
             outputs = self.model(**inputs)
 
         probs = torch.nn.functional.softmax(outputs.logits, dim=1)
@@ -77,33 +111,54 @@ class EmotionDetectionAgent:
             "bbox": (x, y, w, h)
         } for i in range(top_probs.shape[1])]
 
-    def run(self):
-        context = zmq.Context()
-        publisher = context.socket(zmq.PUB)
-        publisher.connect("tcp://localhost:5555")
+    def process_frame(self, frame, captured_at=None):
+        """Detect, publish and speak the top emotion in one frame without any display (vision pipeline)"""
+        trace = start_trace("emotion", captured_at)
+        emotions = self.detect_emotion(frame)
+        mark(trace, "inference")
+        if emotions:
+            top_emotion = emotions[0]
+            self._publish(top_emotion, trace)
+            if top_emotion["score"] > 0.7:
+                self.speak_emotion(top_emotion["label"])
+        return emotions
+
+    def _publish(self, top_emotion, trace=None):
+        self.mcp.publish("emotion", {
+            "top_emotion": top_emotion["label"],
+            "confidence": top_emotion["score"]
+        }, key=top_emotion["label"], trace=trace)
 
-        cap = cv2.VideoCapture(0)
+    def run(self):
+        cap = open_frame_source(self.source)
         self.running = True
+        emotions = None
+        if self.motion_gate is not None:
+            self.motion_gate.reset()  # Compare against this session's frames only
 
         try:
             while self.running:
-                ret, frame = cap.read()
+                with metrics.timer("emotion.capture_seconds"):
+                    ret, frame = cap.read()
                 if not ret:
                     break
-
-                emotions = self.detect_emotion(frame)
+                metrics.counter("emotion.frames").inc()
+
+                fresh = (self.motion_gate is None or emotions is None or
+                         self.motion_gate.changed(frame))
+                trace = None
+                if fresh:
+                    trace = start_trace("emotion", capture_time(cap))
+                    emotions = self.detect_emotion(frame)
+                    mark(trace, "inference")
+                else:
+                    metrics.counter("emotion.frames_skipped").inc()
                 if emotions:
                     top_emotion = emotions[0]
 
-                    # Publish to ZMQ
-                    publisher.send_json({
-                        "agent": "emotion",
-                        "data": {
-                            "top_emotion": top_emotion["label"],
-                            "confidence": top_emotion["score"]
-                        },
-                        "timestamp": time.time()
-                    })
+                    # Publish to ZMQ (a reused result carries nothing new)
+                    if fresh:
+                        self._publish(top_emotion, trace)
 
                     # Speak the emotion
                     if top_emotion["score"] > 0.7:  # Only speak if confidence > 70%
@@ -132,8 +187,7 @@ class EmotionDetectionAgent:
             cap.release()
             cv2.destroyAllWindows()
             self.tts_engine.stop()
-            publisher.close()
-            context.term()
+            self.mcp.flush()
 
     def run_non_blocking(self):
         """Run emotion detection in a background thread."""
@@ -1,28 +1,24 @@
 import zmq
-import json
 import time  # <-- Required for timestamp
-from threading import Thread
+from core.mcp_protocol import publish
+from core.mcp_transport import get_socket
+
+
+VISION_BRIDGE_ENDPOINT = "tcp://*:5570"  # Dedicated vision channel
 
 
 class VisionBridge:
-    def __init__(self):
-        # MCP Setup (PUB pattern)
-        self.context = zmq.Context()
-        self.publisher = self.context.socket(zmq.PUB)
-        self.publisher.bind("tcp://*:5570")  # Dedicated vision channel
-        print("[MCP DEBUG] VisionBridge publisher bound to tcp://*:5570")
+    def __init__(self, endpoint=VISION_BRIDGE_ENDPOINT):
+        # MCP Setup (PUB pattern), bound on first use rather than at import
+        self.endpoint = endpoint
+        self.publisher = None
 
     def publish_result(self, agent_type: str, data: dict):
         """Standardized MCP message format"""
-        message = {
-            "source": "vision",
-            "agent": agent_type,
-            "data": data,
-            "timestamp": time.time()
-        }
-        print(f"[MCP DEBUG] Publishing message from '{agent_type}': {json.dumps(message, indent=2)}")
-        self.publisher.send_json(message)
+        if self.publisher is None:
+            self.publisher = get_socket(zmq.PUB, self.endpoint, bind=True)
+        publish(self.publisher, agent_type, data, timestamp=time.time(), flags=zmq.NOBLOCK)
 
 
-# Singleton bridge instance
+# Singleton bridge instance (binding happens on the first publish_result)
 vision_bridge = VisionBridge()
@@ -1,52 +1,86 @@
 import cv2
 import time
+import numpy as np
 from collections import defaultdict
 from ultralytics import YOLO
-from core.utils import speak
-import zmq
+from core.utils import speak, PRIORITY_URGENT, PRIORITY_LOW
+from core.frame_source import open_frame_source
+from core.motion_gate import MotionGate
+from core.model_registry import model_registry
+from core.mcp_client import get_publisher
+from core.metrics import metrics
+from core.tracing import start_trace, mark, capture_time
 import threading
 
 
 class ObjectDetectionAgent:
-    def __init__(self):
+    def __init__(self, source=None, motion_gate=None):
         self.MAX_RUNTIME = 120  # Maximum runtime in seconds
         self.COOLDOWN_SEC = 15  # Cooldown between announcements
         self.running = False  # Initialize as False, set to True when running
-        self.model = YOLO("../yolov8n.pt")
         self.last_spoken = defaultdict(float)
-        self.camera = cv2.VideoCapture(0)
+        self.source = source  # Frame source spec (live camera unless a replay spec is given)
         self.lock = threading.Lock()
 
-        # MCP Setup
-        self.context = zmq.Context()
-        self.mcp_socket = self.context.socket(zmq.PUB)
-        self.mcp_socket.connect("tcp://localhost:5555")
+        # Optional change detection: reuse the last result while the scene is static
+        self.motion_gate = MotionGate() if motion_gate is True else motion_gate
+        self.last_detection = None
+
+        # MCP Setup: shared client that drops repeats and caps the publish rate
+        self.mcp = get_publisher()
+
+    @staticmethod
+    def load_model():
+        """Shared YOLOv8n instance, reloaded on demand if evicted"""
+        return model_registry.get("yolov8n", lambda: YOLO("../yolov8n.pt"))
+
+    @property
+    def model(self):
+        return self.load_model()
+
+    @classmethod
+    def preload(cls):
+        """Load and warm up the model without building an agent (master prewarm)"""
+        cls.load_model()(np.zeros((480, 640, 3), dtype=np.uint8), verbose=False)
 
     def run(self):
         """Main execution method that MasterAgent will call"""
         self.running = True
+        self.last_detection = None  # Nothing carries over from an earlier session
+        if self.motion_gate is not None:
+            self.motion_gate.reset()
         start_time = time.time()
+        camera = None  # Local: terminate() may run on another thread mid-read
 
         try:
+            camera = open_frame_source(self.source)
+            if not camera.isOpened():
+                speak("Camera failed to initialize", priority=PRIORITY_URGENT)
+                return
+
             while self.running and (time.time() - start_time) < self.MAX_RUNTIME:
-                ret, frame = self.camera.read()
+                with metrics.timer("object.capture_seconds"):
+                    ret, frame = camera.read()
                 if not ret:
-                    speak("Camera error occurred")
+                    speak("Camera error occurred", priority=PRIORITY_URGENT)
                     break
-
-                # Perform object detection
-                results = self.model(frame)
-                detected_objects = set()
-
-                for result in results:
-                    for box in result.boxes:
-                        class_id = int(box.cls)
-                        detected_objects.add(result.names[class_id])
+                metrics.counter("object.frames").inc()
+
+                # Perform object detection (skipped if nothing moved)
+                trace = None
+                if (self.motion_gate is None or self.last_detection is None or
+                        self.motion_gate.changed(frame)):
+                    trace = start_trace("object", capture_time(camera))
+                    self.last_detection = self.detect(frame)
+                    mark(trace, "inference")
+                else:
+                    metrics.counter("object.frames_skipped").inc()
+                results, detected_objects = self.last_detection
 
                 # Announce and publish new detections
                 if detected_objects:
                     with self.lock:
-                        self._announce_objects(detected_objects)
+                        self._announce_objects(detected_objects, results, trace)
 
                 # Display results
                 self._display_frame(frame, results)
@@ -58,51 +92,72 @@ class ObjectDetectionAgent:
         except Exception as e:
             speak(f"Object detection error: {str(e)}")
         finally:
-            self.terminate()
+            self.running = False
+            if camera is not None:
+                camera.release()
+            cv2.destroyAllWindows()
+            self.mcp.flush()
+
+    def detect(self, frame):
+        """Run YOLO on one frame; returns (results, set of class names)"""
+        with metrics.timer("object.inference_seconds"):
+            results = self.model(frame)
+        detected_objects = set()
+
+        for result in results:
+            for box in result.boxes:
+                class_id = int(box.cls)
+                detected_objects.add(result.names[class_id])
+        return results, detected_objects
+
+    def process_frame(self, frame, captured_at=None):
+        """Detect, announce and publish for one frame without any display (vision pipeline)"""
+        trace = start_trace("object", captured_at)
+        results, detected_objects = self.detect(frame)
+        mark(trace, "inference")
+        if detected_objects:
+            with self.lock:
+                self._announce_objects(detected_objects, results, trace)
+        return results, detected_objects
 
     def _display_frame(self, frame, results):
         """Display the frame with detection results"""
-        annotated_frame = results[0].plot()
+        annotated_frame = results[0].plot(img=frame)
         cv2.putText(annotated_frame, "Object Detection", (20, 30),
                     cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 255), 2)
         cv2.putText(annotated_frame, "Press 'q' to quit", (20, 70),
                     cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
         cv2.imshow("Object Detection", annotated_frame)
 
-    def _announce_objects(self, objects):
+    def _announce_objects(self, objects, results=None, trace=None):
         """Handle object announcement and MCP publishing"""
         now = time.time()
+
+        # MCP Integration: once per frame, the client suppresses unchanged sets
+        with metrics.timer("object.publish_seconds"):
+            self._publish_to_mcp(objects, results, trace)
+
         for obj in objects:
             if now - self.last_spoken[obj] > self.COOLDOWN_SEC:
-                # MCP Integration
-                self._publish_to_mcp(objects)
-
-                # Existing functionality
-                speak(f"I see a {obj}")
+                speak(f"I see a {obj}", priority=PRIORITY_LOW, kind=f"object:{obj}", max_age=5)
                 self.last_spoken[obj] = now
 
-    def _publish_to_mcp(self, objects):
-        """Send detection results to MCP"""
-        self.mcp_socket.send_json({
-            "source": "vision",
-            "agent": "object",
-            "data": {
-                "objects": list(objects),
-                "count": len(objects)
-            },
-            "timestamp": time.time()
-        })
+    def _publish_to_mcp(self, objects, results=None, trace=None):
+        """Send detection results (with boxes and scores when available) to MCP"""
+        data = {
+            "objects": list(objects),
+            "count": len(objects)
+        }
+        if results:
+            boxes = results[0].boxes
+            data["labels"] = [results[0].names[int(c)] for c in boxes.cls]
+            data["boxes"] = boxes.xyxy.cpu().numpy().astype(np.float32)
+            data["scores"] = boxes.conf.cpu().numpy().astype(np.float32)
+        self.mcp.publish("object", data, key=sorted(objects), trace=trace)
 
     def terminate(self):
-        """Clean up resources - called by MasterAgent during shutdown"""
+        """Ask run() to stop; it releases the camera itself (safe from any thread)"""
         self.running = False
-        if hasattr(self, 'camera') and self.camera.isOpened():
-            self.camera.release()
-        cv2.destroyAllWindows()
-        if hasattr(self, 'mcp_socket'):
-            self.mcp_socket.close()
-        if hasattr(self, 'context'):
-            self.context.term()
 
 if __name__ == "__main__":
     # For standalone testing